@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Mesures de performance du Mastermind
+
+import json
+import platform
+import sys
+import time
+import timeit
+
+from mastermind import (get_space, count_well_placed, count_colors, valid_colors, check_unique, to_colors_name,
+                        is_valid_comb, score_batch, split_feedback, score_pairs, DEFAULT_COLORS, GameConfig)
+
+TOLERANCE = 0.20  # Ralentissement toléré par rapport à la référence avant de signaler une régression
+
+# Variantes utilisées par les mesures du solveur : (nom, config, stratégie)
+BOARDS = [
+    ("4p8c", GameConfig(), "minimax"),
+    ("4p8c-first", GameConfig(), "first"),
+    ("5p8c-first", GameConfig(pegs=5, colors=8), "first"),
+    ("4p6c-repeats", GameConfig(pegs=4, colors=6, repeats=True), "minimax"),
+    ("5p10c-repeats-first", GameConfig(pegs=5, colors=10, repeats=True), "first"),
+]
+
+
+def best_time(func, number=100, repeat=5):
+    """
+    Renvoie le meilleur temps moyen d'un appel à func (en secondes).
+    """
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_batch_scoring():
+    """
+    Compare le score d'un essai contre toutes les combinaisons : boucle Python sur count_well_placed et
+    count_colors contre un seul appel à score_batch.
+
+    Valeurs de retour:
+    dict. Temps (en secondes) des deux méthodes et accélération.
+    """
+    space = get_space()
+    guess = space.codes[0]
+    codes = space.codes
+    digits = space.digits
+    guess_digits = space.code_digits(0)
+
+    def scalar():
+        return [(count_well_placed(guess, comb, space), count_colors(guess, comb, space)) for comb in codes]
+
+    def batch():
+        return split_feedback(score_batch(guess_digits, digits))
+
+    blacks, whites = batch()
+    assert scalar() == list(zip(blacks, whites))  # Les deux méthodes doivent donner les mêmes réponses
+
+    scalar_time = best_time(scalar, number=10)
+    batch_time = best_time(batch, number=1000)
+    return {"codes": space.size, "scalar": scalar_time, "batch": batch_time, "speedup": scalar_time / batch_time}
+
+
+def bench_pair_scoring(pairs=20000):
+    """
+    Mesure score_pairs (réponses de nombreuses paires essai/solution en un appel) avec la table d'un petit espace
+    et sans table sur un grand espace.
+
+    Valeurs de retour:
+    dict. Nom de la mesure -> secondes par paire.
+    """
+    import random
+
+    results = {}
+    for name, config in [("4p8c", GameConfig()), ("6p12c-repeats", GameConfig(pegs=6, colors=12, repeats=True))]:
+        space = get_space(config.palette(), config)
+        rng = random.Random(name)
+        guesses = [rng.randrange(space.size) for i in range(pairs)]
+        secrets = [rng.randrange(space.size) for i in range(pairs)]
+        score_pairs(guesses, secrets, space)  # Mise en route : lignes de la table
+        results["score_pairs/" + name] = best_time(lambda: score_pairs(guesses, secrets, space), 1) / pairs
+    return results
+
+
+def bench_sessions(sessions=1000000, moves=3):
+    """
+    Mesure la mémoire de sessions inactives : sessions parties en cours (GameState) qui ont chacune joué moves
+    essais, gardées dans une liste comme un serveur garde ses sessions. Pour comparaison, la mémoire d'une partie
+    Game dans le même état (mesurée sur moins de parties).
+
+    Valeurs de retour:
+    dict. {"sessions", "state_bytes", "game_bytes", "suspended_bytes"} : octets par session (pointeur de la liste
+    compris) et taille d'une session suspendue (GameState.to_bytes).
+    """
+    import random
+    import tracemalloc
+
+    from mastermind import Game, GameState
+
+    space = get_space()
+    rng = random.Random(0)
+    for guess in range(space.size):  # Lignes de la table calculées avant la mesure
+        space.row(guess)
+
+    def measure(count, make):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        kept = [make() for i in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        return used / count, kept[-1]
+
+    def make_state():
+        state = GameState(rng.randrange(space.size))
+        for i in range(moves):
+            state.play(space, rng.randrange(space.size))
+        return state
+
+    def make_game():
+        game = Game(secret=space.decode(rng.randrange(space.size)))
+        game.start()
+        for i in range(moves):
+            game.submit_guess(space.decode(rng.randrange(space.size)))
+        return game
+
+    state_bytes, state = measure(sessions, make_state)
+    game_bytes, game = measure(max(1, sessions // 100), make_game)
+    return {"sessions": sessions, "state_bytes": state_bytes, "game_bytes": game_bytes,
+            "suspended_bytes": len(state.to_bytes())}
+
+
+def micro_benchmarks(number=20000):
+    """
+    Mesure les fonctions appelées à chaque essai, sur des combinaisons valides (rien n'est affiché).
+
+    Valeurs de retour:
+    dict. Nom de la mesure -> secondes par appel.
+    """
+    colors = list(DEFAULT_COLORS)
+    space = get_space(colors)
+    guess, comb = "bjov", "borv"
+    space.row(space.encode(guess))  # La ligne de la solution est calculée une fois par partie, pas à chaque essai
+    cases = {
+        "count_well_placed": lambda: count_well_placed(guess, comb, space),
+        "count_colors": lambda: count_colors(guess, comb, space),
+        "valid_colors": lambda: valid_colors(comb, colors),
+        "check_unique": lambda: check_unique(comb),
+        "to_colors_name": lambda: to_colors_name(comb, colors),
+        "is_valid_comb": lambda: is_valid_comb(comb, colors),
+    }
+    return {name: best_time(func, number) for name, func in cases.items()}
+
+
+def macro_benchmarks(games=50):
+    """
+    Mesure le solveur sur chaque variante de BOARDS : parties complètes par seconde et coups par seconde.
+
+    Comme dans simulate, les stratégies qui calculent leurs coups jouent avec leur livre d'ouvertures (construit
+    avant la mesure) ; "move-nobook/..." mesure les mêmes parties sans livre, où chaque coup est calculé.
+
+    Valeurs de retour:
+    dict. Nom de la mesure -> secondes par partie ou par coup.
+    """
+    import random
+    from opening_book import open_book
+    from simulation import play_headless
+    from solver import Solver, STRATEGIES
+
+    def measure(solver, secrets, tries):
+        play_headless(solver, secrets[0], tries)  # Mise en route : tables et premier coup
+        moves = 0
+        start = time.perf_counter()
+        for secret in secrets:
+            moves += play_headless(solver, secret, tries) or tries
+        return time.perf_counter() - start, moves
+
+    results = {}
+    for name, config, strategy in BOARDS:
+        colors = config.palette()
+        rng = random.Random(name)
+        secrets = [rng.randrange(get_space(colors, config).size) for i in range(games)]
+        book = None
+        if STRATEGIES[strategy] is not None:
+            seconds, moves = measure(Solver(colors, strategy, config), secrets, config.tries)
+            results["move-nobook/" + name] = seconds / moves
+            book = open_book(colors, config, strategy)
+        seconds, moves = measure(Solver(colors, strategy, config, book), secrets, config.tries)
+        results["game/" + name] = seconds / games
+        results["move/" + name] = seconds / moves
+    return results
+
+
+def run_all(quick=False):
+    """
+    Lance toutes les mesures.
+
+    Valeurs de retour:
+    dict. {"python", "benchmarks": {nom: secondes par opération}}.
+    """
+    results = micro_benchmarks(2000 if quick else 20000)
+    results.update(macro_benchmarks(10 if quick else 50))
+    batch = bench_batch_scoring()
+    results["score_batch"] = batch["batch"]
+    results["score_loop"] = batch["scalar"]
+    results.update(bench_pair_scoring(2000 if quick else 20000))
+    return {"python": platform.python_version(), "benchmarks": results}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compare des mesures à une référence.
+
+    Valeurs de retour:
+    list. Les (nom, référence, mesure, rapport) des mesures plus lentes que la référence de plus de tolerance.
+    """
+    regressions = []
+    for name, seconds in results["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference and seconds > reference * (1 + tolerance):
+            regressions.append((name, reference, seconds, seconds / reference))
+    return regressions
+
+
+def show(results, baseline=None):
+    for name, seconds in sorted(results["benchmarks"].items()):
+        line = "    %-32s %12.3f µs  %12.0f /s" % (name, seconds * 1e6, 1 / seconds)
+        if baseline and name in baseline["benchmarks"]:
+            line += "   x%.2f" % (seconds / baseline["benchmarks"][name])
+        print(line)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mesures de performance du Mastermind")
+    parser.add_argument("--json", help="fichier où écrire les résultats")
+    parser.add_argument("--baseline", help="résultats de référence : code de sortie 1 en cas de régression")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--quick", action="store_true", help="moins de répétitions")
+    parser.add_argument("--sessions", type=int, help="mesurer seulement la mémoire de SESSIONS parties inactives")
+    args = parser.parse_args()
+
+    if args.sessions:
+        memory = bench_sessions(args.sessions)
+        print("%(sessions)d sessions inactives : %(state_bytes).0f octets par session (Game : %(game_bytes).0f octets), "
+              "%(suspended_bytes)d octets suspendue" % memory)
+        sys.exit(0)
+
+    results = run_all(args.quick)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    show(results, baseline)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, reference, seconds, ratio in regressions:
+            print("Régression :", name, "%.3f µs -> %.3f µs (x%.2f)" % (reference * 1e6, seconds * 1e6, ratio))
+        if regressions:
+            sys.exit(1)
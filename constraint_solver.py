@@ -0,0 +1,239 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Joueur automatique pour les grandes variantes : les réponses reçues sont des contraintes, sans énumérer les
+# combinaisons
+
+import random
+
+from mastermind import score_pair, full_game, GameConfig, DEFAULT_CONFIG
+
+ENUMERATION_LIMIT = 2000000  # Taille maximale de l'espace pour essayer le solveur énumératif dans compare
+
+
+class ConstraintSolver:
+    """
+    Joueur automatique qui ne construit jamais l'espace des combinaisons : chaque réponse (bien placés, mal placés)
+    devient une contrainte, et chaque essai est une combinaison compatible avec toutes les contraintes, trouvée
+    par une recherche en profondeur avec retour arrière sur les couleurs de chaque position.
+
+    Les couleurs possibles de chaque position (domaines) sont réduites à chaque réponse, et la recherche abandonne
+    une branche dès qu'une contrainte ne peut plus être satisfaite, ni en bien placés ni en couleurs communes.
+    Comme Solver, il se branche sur game() par next_guess et observe.
+
+    Exemples:
+    >>> solver = ConstraintSolver(config=GameConfig(pegs=6, colors=12, repeats=True), rng=random.Random(1))
+    >>> solver.observe("bbbbbb", 0, 0)
+    >>> "b" in solver.next_guess()
+    False
+    """
+
+    def __init__(self, colors=None, config=None, rng=None):
+        if config is None:
+            config = DEFAULT_CONFIG
+        if colors is None:
+            colors = config.palette()
+        self.config = config
+        self.pegs = config.pegs
+        self.repeats = config.repeats
+        self.symbols = ''.join(sorted(symbol for symbol, name in colors))  # Même ordre que CodeSpace
+        self._digit = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.rng = random.Random() if rng is None else rng
+        self.nodes = 0  # Nombre de nœuds visités par la dernière recherche
+        self.reset()
+
+    def reset(self):
+        """
+        Recommence une partie : plus aucune contrainte.
+        """
+        n = len(self.symbols)
+        self.domains = [(1 << n) - 1 for p in range(self.pegs)]  # Un bit par couleur possible à la position p
+        self.constraints = []  # Liste des (chiffres de l'essai, bien placés, couleurs communes, nombre par couleur)
+
+    def observe(self, comb, black, white):
+        """
+        Ajoute la contrainte de la réponse (black, white) à l'essai comb et réduit les domaines.
+        """
+        digits = [self._digit[symbol] for symbol in comb]
+        counts = [0] * len(self.symbols)
+        for digit in digits:
+            counts[digit] += 1
+        common = black + white
+        self.constraints.append((digits, black, common, counts))
+
+        domains = self.domains
+        if black == 0:  # Aucune couleur n'est à sa place
+            for p, digit in enumerate(digits):
+                domains[p] &= ~(1 << digit)
+        if common == 0:  # Aucune couleur de l'essai n'est dans la solution
+            used = 0
+            for digit in digits:
+                used |= 1 << digit
+            domains[:] = [domain & ~used for domain in domains]
+        elif common == self.pegs and not self.repeats:  # La solution n'a que les couleurs de l'essai
+            used = 0
+            for digit in digits:
+                used |= 1 << digit
+            domains[:] = [domain & used for domain in domains]
+        if black == self.pegs:
+            domains[:] = [1 << digit for digit in digits]
+
+    def next_guess(self):
+        """
+        Renvoie une combinaison (str) compatible avec toutes les réponses reçues, choisie au hasard parmi elles.
+        """
+        code = self._search()
+        if code is None:
+            raise ValueError("Aucune combinaison n'est compatible avec les réponses reçues")
+        return ''.join(self.symbols[digit] for digit in code)
+
+    def _search(self):
+        pegs = self.pegs
+        n = len(self.symbols)
+        rng = self.rng
+        constraints = self.constraints
+        domains = [[c for c in range(n) if domain >> c & 1] for domain in self.domains]
+        order = sorted(range(pegs), key=lambda p: len(domains[p]))  # Les positions les plus contraintes d'abord
+        # reachable[k][i] : nombre de positions order[i:] où la couleur de l'essai k est encore possible
+        reachable = []
+        for digits, black, common, counts in constraints:
+            suffix = [0] * (pegs + 1)
+            for i in range(pegs - 1, -1, -1):
+                p = order[i]
+                suffix[i] = suffix[i + 1] + (self.domains[p] >> digits[p] & 1)
+            reachable.append(suffix)
+
+        blacks = [0] * len(constraints)
+        commons = [0] * len(constraints)
+        color_counts = [0] * n  # Nombre de fois que chaque couleur est déjà utilisée
+        code = [0] * pegs
+        self.nodes = 0
+
+        def extend(i):
+            if i == pegs:
+                return True
+            p = order[i]
+            left = pegs - i - 1  # Positions encore libres après celle-ci
+            colors = domains[p][:]
+            rng.shuffle(colors)
+            for color in colors:
+                if not self.repeats and color_counts[color]:
+                    continue
+                self.nodes += 1
+                ok = True
+                for k, (digits, black, common, counts) in enumerate(constraints):
+                    b = blacks[k] + (digits[p] == color)
+                    c = commons[k] + (color_counts[color] < counts[color])
+                    # Trop de bien placés ou de couleurs communes, ou plus assez de positions pour en avoir assez
+                    if b > black or b + reachable[k][i + 1] < black or c > common or c + left < common:
+                        ok = False
+                        break
+                if not ok:
+                    continue
+                for k, (digits, black, common, counts) in enumerate(constraints):
+                    blacks[k] += digits[p] == color
+                    commons[k] += color_counts[color] < counts[color]
+                color_counts[color] += 1
+                code[p] = color
+                if extend(i + 1):
+                    return True
+                color_counts[color] -= 1
+                for k, (digits, black, common, counts) in enumerate(constraints):
+                    blacks[k] -= digits[p] == color
+                    commons[k] -= color_counts[color] < counts[color]
+            return False
+
+        return code if extend(0) else None
+
+
+def play(solver, secret, max_tries=100):
+    """
+    Fait jouer solver (Solver ou ConstraintSolver) contre la solution secret (str), sans affichage.
+
+    Valeurs de retour:
+    int. Nombre d'essais utilisés, ou 0 si la solution n'est pas trouvée en max_tries essais.
+    """
+    solver.reset()
+    pegs = len(secret)
+    for attempt in range(1, max_tries + 1):
+        comb = solver.next_guess()
+        black, white = score_pair(comb, secret)
+        if black == pegs:
+            return attempt
+        solver.observe(comb, black, white)
+    return 0
+
+
+def compare(configs, games=20, seed=0):
+    """
+    Compare ConstraintSolver au solveur énumératif (Solver, stratégie "first" : premier candidat restant) sur les
+    variantes configs. Le solveur énumératif n'est essayé que jusqu'à ENUMERATION_LIMIT combinaisons.
+
+    Valeurs de retour:
+    list. Pour chaque variante, un dict {"config", "size", "constraint", "enumeration"} où chaque solveur a
+    {"setup", "per_game", "average", "worst", "failures"} (secondes, essais), ou None s'il n'a pas été essayé.
+    """
+    import time
+
+    from solver import Solver
+
+    results = []
+    for config in configs:
+        colors = config.palette()
+        rng = random.Random(seed)
+        symbols = [symbol for symbol, name in colors]
+        secrets = [''.join(rng.choices(symbols, k=config.pegs) if config.repeats else rng.sample(symbols, config.pegs))
+                   for i in range(games)]
+        row = {"config": config, "size": config.space_size(), "constraint": None, "enumeration": None}
+        players = [("constraint", lambda: ConstraintSolver(colors, config, random.Random(seed)))]
+        if config.space_size() <= ENUMERATION_LIMIT:
+            players.append(("enumeration", lambda: Solver(colors, "first", config)))
+        for name, make in players:
+            start = time.perf_counter()
+            solver = make()
+            if name == "enumeration":
+                solver.space.color_counts  # Les chiffres de toutes les combinaisons sont construits ici
+            setup = time.perf_counter() - start
+            start = time.perf_counter()
+            attempts = [play(solver, secret) for secret in secrets]
+            seconds = time.perf_counter() - start
+            won = [a for a in attempts if a]
+            row[name] = {"setup": setup, "per_game": seconds / games,
+                         "average": sum(won) / len(won) if won else 0.0, "worst": max(won) if won else 0,
+                         "failures": games - len(won)}
+        results.append(row)
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solveur par contraintes pour les grandes variantes")
+    parser.add_argument("--compare", action="store_true", help="comparer au solveur énumératif")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--pegs", type=int, default=6)
+    parser.add_argument("--colors", type=int, default=12)
+    parser.add_argument("--repeats", action="store_true")
+    parser.add_argument("--tries", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.compare:
+        configs = [GameConfig(pegs=4, colors=8), GameConfig(pegs=5, colors=10, repeats=True),
+                   GameConfig(pegs=6, colors=10, repeats=True), GameConfig(pegs=6, colors=12, repeats=True),
+                   GameConfig(pegs=8, colors=12, repeats=True)]
+        for row in compare(configs, args.games):
+            config = row["config"]
+            print("%d pions, %d couleurs%s : %d combinaisons" % (config.pegs, config.colors,
+                                                               ", répétitions" if config.repeats else "", row["size"]))
+            for name in ("constraint", "enumeration"):
+                stats = row[name]
+                if stats is None:
+                    print("    %-12s trop grand pour être énuméré" % name)
+                else:
+                    print("    %-12s préparation %8.3f s, %8.3f s/partie, %.2f essais en moyenne (pire : %d, "
+                          "échecs : %d)" % (name, stats["setup"], stats["per_game"], stats["average"],
+                                           stats["worst"], stats["failures"]))
+    else:
+        config = GameConfig(pegs=args.pegs, colors=args.colors, repeats=args.repeats, tries=args.tries)
+        full_game(config.palette(), ConstraintSolver(config=config), config)
@@ -0,0 +1,172 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Évaluation exacte d'une stratégie du solveur sur toutes les solutions possibles
+
+import os
+from collections import Counter
+
+from mastermind import pack_feedback, CandidateSet, DEFAULT_CONFIG
+from opening_book import open_book
+from snapshot import attach_space, open_space, share_table
+from solver import Solver
+
+SPLIT_DEPTH = 2  # Les noeuds de cette profondeur sont répartis entre les processus
+
+_subtrees = {}  # Distributions des sous-arbres déjà parcourus dans ce processus
+
+
+def _subtree(solver, candidates, history):
+    """
+    Parcourt l'arbre de décision de la stratégie à partir d'un noeud.
+
+    Deux noeuds avec les mêmes candidats et les mêmes couleurs déjà jouées mènent aux mêmes décisions (c'est tout ce
+    dont dépend le solveur) : leur sous-arbre n'est parcouru qu'une fois.
+
+    Valeurs de retour:
+    Counter. Pour chaque nombre d'essais (compté depuis ce noeud), le nombre de solutions trouvées en autant d'essais.
+    """
+    space = solver.space
+    played = frozenset(c for guess, feedback in history for c in space.decode(guess))
+    key = (space.symbols, space.pegs, space.repeats, solver.strategy, candidates.key(), played)
+    result = _subtrees.get(key)
+    if result is not None:
+        return result
+
+    solver.restore(candidates, history)
+    guess = solver.choose()
+    result = Counter()
+    if guess in candidates:  # La solution peut être l'essai lui-même
+        result[1] += 1
+    win = pack_feedback(space.pegs, 0, space.pegs)
+    row = space.row(guess)
+    for feedback in sorted(set(row[c] for c in candidates)):
+        if feedback == win:
+            continue
+        child = candidates.copy()
+        child.filter(guess, feedback)
+        for attempts, count in _subtree(solver, child, history + [(guess, feedback)]).items():
+            result[attempts + 1] += count
+    _subtrees[key] = result
+    return result
+
+
+def _frontier(solver, depth):
+    """
+    Développe l'arbre jusqu'à la profondeur depth.
+
+    Valeurs de retour:
+    tuple. (Counter des solutions trouvées avant depth, liste des historiques des noeuds de profondeur depth).
+    """
+    space = solver.space
+    win = pack_feedback(space.pegs, 0, space.pegs)
+    found = Counter()
+    frontier = []
+    level = [(CandidateSet(space), [])]
+    for d in range(depth):
+        next_level = []
+        for candidates, history in level:
+            solver.restore(candidates, history)
+            guess = solver.choose()
+            if guess in candidates:
+                found[d + 1] += 1
+            row = space.row(guess)
+            for feedback in sorted(set(row[c] for c in candidates)):
+                if feedback != win:
+                    child = candidates.copy()
+                    child.filter(guess, feedback)
+                    next_level.append((child, history + [(guess, feedback)]))
+        level = next_level
+    for candidates, history in level:
+        frontier.append(history)
+    return found, frontier
+
+
+def _evaluate_node(task):
+    """
+    Parcourt dans un processus de travail le sous-arbre d'un noeud, reconstruit à partir de son historique.
+    """
+    colors, config, strategy, book, table, history = task
+    attach_space(table, colors, config)
+    solver = Solver(colors, strategy, config, open_book(colors, config, strategy) if book else None)
+    candidates = CandidateSet(solver.space)
+    for guess, feedback in history:
+        candidates.filter(guess, feedback)
+    return len(history), _subtree(solver, candidates, history)
+
+
+def evaluate(strategy="minimax", colors=None, config=None, workers=None, book=True, split_depth=SPLIT_DEPTH):
+    """
+    Calcule exactement le nombre d'essais dont la stratégie a besoin pour chaque solution possible.
+
+    Arguments:
+    - strategy (str) : nom d'une stratégie de solver.STRATEGIES.
+    - colors (list) : liste de tuples (symbole, nom). Par défaut, DEFAULT_COLORS.
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+    - workers (int) : nombre de processus (par défaut, le nombre de cœurs). 1 : tout dans le processus courant.
+    - book (bool) : True pour utiliser le livre d'ouvertures (voir opening_book.py).
+    - split_depth (int) : profondeur des noeuds répartis entre les processus.
+
+    Valeurs de retour:
+    dict. {"secrets", "average", "worst", "failures", "distribution"} où distribution associe à chaque nombre
+    d'essais le nombre de solutions trouvées en autant d'essais, et failures compte les solutions qui demandent
+    plus d'essais que config.tries.
+
+    Exemples:
+    >>> evaluate("minimax")["worst"]
+    6
+    """
+    if config is None:
+        config = DEFAULT_CONFIG
+    open_space(colors, config)  # Table complète, calculée une fois et projetée par les processus de travail
+    solver = Solver(colors, strategy, config, open_book(colors, config, strategy) if book else None)
+    total, frontier = _frontier(solver, split_depth)
+    table = None if workers == 1 else share_table(colors, config)  # Une seule copie de la table pour tous
+    name = None if table is None else table.name
+    tasks = [(colors, config, strategy, book, name, history) for history in frontier]
+
+    if workers == 1:
+        results = map(_evaluate_node, tasks)
+        pool = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        results = pool.map(_evaluate_node, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count()))))
+    try:
+        for depth, distribution in results:
+            for attempts, count in distribution.items():
+                total[attempts + depth] += count
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if table is not None:
+            table.close()
+
+    secrets = sum(total.values())
+    return {
+        "secrets": secrets,
+        "average": sum(attempts * count for attempts, count in total.items()) / secrets,
+        "worst": max(total),
+        "failures": sum(count for attempts, count in total.items() if attempts > config.tries),
+        "distribution": dict(sorted(total.items())),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Évaluation exacte des stratégies du solveur")
+    parser.add_argument("strategies", nargs="*", default=["minimax"])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    for name in args.strategies:
+        start = time.time()
+        result = evaluate(name, workers=args.workers)
+        print("%s : moyenne %.4f, pire cas %d, échecs %d (%.1f s)" % (name, result["average"], result["worst"],
+                                                                      result["failures"], time.time() - start))
+        for attempts, count in result["distribution"].items():
+            print("   ", attempts, "essai(s) :", count)
@@ -0,0 +1,184 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Journal binaire des parties : un enregistrement de taille fixe par essai, ajouté en fin de fichier
+
+import mmap
+import os
+import struct
+import time
+
+from mastermind import get_space, GameConfig
+
+MAGIC = b'MMLG'
+VERSION = 2
+HEADER = struct.Struct('<4sHBB24s')  # magic, version, pions, répétitions, symboles de l'espace (32 octets)
+# session, horodatage (ns), solution, essai, bien placés, mal placés, drapeaux (40 octets) : les entiers des
+# combinaisons sur 64 bits, comme GameState pour les espaces de plus de 2^32 combinaisons
+RECORD = struct.Struct('<QQQQBBB5x')
+RECORDS = {1: struct.Struct('<QQIIBBB5x'), VERSION: RECORD}  # Version -> enregistrement (lecture des anciens journaux)
+PID_BITS = 22  # Bits du numéro de processus dans un identifiant de partie (pid_max de Linux : 2^22)
+FLAG_LAST = 1  # Dernier essai de la partie (gagnée ou perdue)
+BUFFER_RECORDS = 4096  # Nombre d'enregistrements gardés en mémoire avant une écriture groupée
+
+
+def _header(space):
+    return HEADER.pack(MAGIC, VERSION, space.pegs, int(space.repeats), space.symbols.encode("ascii"))
+
+
+class GameRecorder:
+    """
+    Écrit les essais de toutes les parties dans un fichier ouvert en ajout. Les enregistrements sont accumulés
+    dans un tampon et écrits par paquets de buffer_records.
+
+    Exemples:
+    >>> import tempfile
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     path = os.path.join(directory, "parties.log")
+    ...     with GameRecorder(path, get_space()) as recorder:
+    ...         recorder.record(1, 42, 7, 1, 2)
+    ...     os.path.getsize(path) > HEADER.size
+    True
+    """
+
+    def __init__(self, path, space, buffer_records=BUFFER_RECORDS):
+        if len(space.symbols) > 24:
+            raise ValueError("Trop de couleurs pour l'en-tête du journal")
+        self.path = path
+        self.space = space
+        self.buffer_records = buffer_records
+        self._buffer = bytearray()
+        self._pending = 0
+        # Identifiants des parties : un compteur parti de l'heure actuelle en ms (ceux d'une exécution précédente
+        # sont plus petits), suivi du numéro de processus pour que deux processus qui écrivent dans le même journal
+        # n'en donnent jamais un identique
+        self._next_session = time.time_ns() // 1000000
+        self._pid = os.getpid() & ((1 << PID_BITS) - 1)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:  # Nouveau fichier : on écrit l'en-tête
+            self._file.write(_header(space))
+        else:
+            with open(path, "rb") as f:
+                if f.read(HEADER.size) != _header(space):
+                    self._file.close()
+                    raise ValueError("Le journal " + path + " a été écrit pour un autre espace de combinaisons")
+
+    def new_session(self):
+        """
+        Renvoie un nouvel identifiant de partie.
+        """
+        self._next_session += 1
+        return self._next_session << PID_BITS | self._pid
+
+    def record(self, session, secret, guess, black, white, last=False, timestamp=None):
+        """
+        Ajoute un essai au journal.
+
+        Arguments:
+        - session (int) : identifiant de la partie.
+        - secret (int) : entier de la solution.
+        - guess (int) : entier de l'essai.
+        - black (int) : nombre de pions bien placés.
+        - white (int) : nombre de pions de bonne couleur mais mal placés.
+        - last (bool) : True si c'est le dernier essai de la partie.
+        - timestamp (int) : horodatage en nanosecondes (par défaut, maintenant).
+        """
+        if timestamp is None:
+            timestamp = time.time_ns()
+        self._buffer += RECORD.pack(session, timestamp, secret, guess, black, white, FLAG_LAST if last else 0)
+        self._pending += 1
+        if self._pending >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        """
+        Écrit le tampon dans le fichier en un seul appel.
+        """
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer = bytearray()
+            self._pending = 0
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class GameLog:
+    """
+    Lecture d'un journal : le fichier est projeté en mémoire (mmap) et parcouru par des générateurs, il n'est donc
+    jamais chargé entièrement.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError("Journal vide : " + path)
+            magic, version, pegs, repeats, symbols = HEADER.unpack(header)
+            if magic != MAGIC or version not in RECORDS:
+                raise ValueError("Ce n'est pas un journal de parties : " + path)
+            self.record = RECORDS[version]
+            size = os.fstat(f.fileno()).st_size
+            # Un enregistrement incomplet en fin de fichier (écriture interrompue) est ignoré
+            self.records = (size - HEADER.size) // self.record.size
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.records else b''
+        symbols = symbols.rstrip(b'\0').decode("ascii")
+        config = GameConfig(pegs=pegs, colors=len(symbols), repeats=bool(repeats))
+        self.space = get_space([(symbol, symbol) for symbol in symbols], config)
+
+    def __len__(self):
+        return self.records
+
+    def moves(self, start=0):
+        """
+        Génère les essais du journal, dans l'ordre d'écriture, à partir de l'enregistrement start.
+
+        Valeurs de retour:
+        Des tuples (session, horodatage, solution, essai, bien placés, mal placés, drapeaux).
+        """
+        end = HEADER.size + self.records * self.record.size
+        view = memoryview(self._data)[HEADER.size + start * self.record.size:end]
+        return self.record.iter_unpack(view)
+
+    def games(self):
+        """
+        Génère les parties terminées : les essais de parties simultanées sont regroupés par session, et seules
+        les parties en cours sont gardées en mémoire.
+
+        Valeurs de retour:
+        Des tuples (session, solution, essais) où essais est la liste des (essai, bien placés, mal placés,
+        horodatage). Les parties non terminées à la fin du journal sont générées en dernier, avec une solution None.
+        """
+        playing = {}  # session -> essais de la partie en cours
+        for session, timestamp, secret, guess, black, white, flags in self.moves():
+            moves = playing.get(session)
+            if moves is None:
+                moves = playing[session] = []
+            moves.append((guess, black, white, timestamp))
+            if flags & FLAG_LAST:
+                del playing[session]
+                yield session, secret, moves
+        for session, moves in playing.items():
+            yield session, None, moves
+
+
+if __name__ == "__main__":
+    import sys
+    from collections import Counter
+
+    log = GameLog(sys.argv[1])
+    lengths = Counter()
+    for session, secret, moves in log.games():
+        lengths[len(moves)] += 1
+    print(len(log), "essais,", sum(lengths.values()), "parties")
+    for attempts, count in sorted(lengths.items()):
+        print("   ", attempts, "essai(s) :", count)
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Indices pour le jeu en console : combinaisons encore possibles et essai conseillé, calculés pendant que le joueur
+# tape son essai
+
+import random
+import time
+from array import array
+from collections import Counter
+from itertools import compress
+
+from mastermind import feedback_mask, get_renderer, get_space, pack_feedback, score_outer
+
+HINT_BUDGET = 0.003  # Temps (en secondes) accordé à la recherche de l'essai conseillé
+HINT_SAMPLE = 512  # Nombre maximal de candidats contre lesquels un essai est évalué
+HINT_GUESSES = 1024  # Nombre maximal d'essais évalués
+
+
+class HintService:
+    """
+    Indices d'une partie en console. Après chaque réponse, les candidats restants sont filtrés à partir de ceux du
+    coup précédent (seuls les survivants sont comparés à l'essai), puis un essai est conseillé : parmi les
+    candidats, celui qui laisse le moins de candidats dans le pire cas, évalué contre un échantillon d'au plus
+    HINT_SAMPLE candidats pendant au plus budget secondes.
+
+    Les calculs sont faits dans un thread : observe rend la main aussitôt, le joueur peut taper son essai pendant
+    que l'indice se calcule.
+
+    Exemples:
+    >>> hints = HintService()
+    >>> hints.observe("bjov", 2, 1)
+    >>> hints.hint()[0]
+    48
+    >>> hints.close()
+    """
+
+    def __init__(self, colors=None, config=None, budget=HINT_BUDGET, seed=None):
+        from concurrent.futures import ThreadPoolExecutor
+
+        self.space = get_space(colors, config)
+        self.renderer = get_renderer(colors, config)
+        self.budget = budget
+        self.rng = random.Random(seed)
+        self._executor = ThreadPoolExecutor(max_workers=1)  # Un seul thread : les coups sont filtrés dans l'ordre
+        self.reset()
+
+    def reset(self):
+        """
+        Recommence une partie : toutes les combinaisons redeviennent candidates.
+        """
+        self._future = self._executor.submit(self._compute, None)
+
+    def observe(self, comb, black, white):
+        """
+        Demande l'indice qui suit la réponse (black, white) à l'essai comb, sans attendre qu'il soit calculé.
+        """
+        self._future = self._executor.submit(self._compute, (self.space.encode(comb),
+                                                             pack_feedback(black, white, self.space.pegs)))
+
+    def ready(self):
+        return self._future.done()
+
+    def hint(self, timeout=None):
+        """
+        Renvoie le dernier indice demandé, en attendant au plus timeout secondes (par défaut, le temps qu'il faut).
+
+        Valeurs de retour:
+        tuple. (nombre de combinaisons encore possibles, entier de l'essai conseillé ou None s'il n'y en a plus).
+        """
+        return self._future.result(timeout)
+
+    def text(self, timeout=None):
+        """
+        Renvoie le texte du dernier indice demandé (voir hint), ou None s'il n'est pas prêt après timeout secondes.
+        """
+        from concurrent.futures import TimeoutError
+
+        try:
+            count, guess = self.hint(timeout)
+        except TimeoutError:
+            return None
+        if guess is None:
+            return "Indice : aucune combinaison ne correspond à toutes les réponses !\n"
+        return "Indice : %d combinaison(s) encore possible(s), essayez %s (%s)\n" % (
+            count, self.space.decode(guess).upper(), self.renderer.name(guess))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _compute(self, move):
+        # Dans le thread des indices : lui seul touche self.alive
+        if move is None:
+            self.alive = None  # Entiers des candidats, ou None tant qu'ils le sont tous
+            if not self.space.has_table():  # Colonnes des grands espaces construites pendant que le joueur tape
+                self.space.columns
+        else:
+            guess, feedback = move
+            space = self.space
+            if self.alive is None:
+                codes = range(space.size)
+                feedbacks = bytes(space.row(guess))
+            elif space.has_table():
+                codes = self.alive
+                feedbacks = bytes(map(space.row(guess).__getitem__, codes))
+            else:
+                codes = self.alive
+                feedbacks = next(score_outer([guess], codes, space))[1]
+            self.alive = array('I', compress(codes, feedback_mask(feedbacks, feedback)))
+        count = self.space.size if self.alive is None else len(self.alive)
+        return count, self._suggest(count)
+
+    def _suggest(self, count):
+        space = self.space
+        rng = self.rng
+        alive = range(space.size) if self.alive is None else self.alive
+        if count <= 2:  # Avec 2 candidats, jouer l'un des deux est optimal
+            return alive[0] if count else None
+        sample = alive if count <= HINT_SAMPLE else [alive[i] for i in rng.sample(range(count), HINT_SAMPLE)]
+        # Essais tirés parmi les candidats (chacun peut gagner), évalués par blocs de 8 jusqu'à la fin du budget
+        guesses = [alive[i] for i in rng.sample(range(count), min(count, HINT_GUESSES))]
+        n = len(sample)
+        deadline = time.perf_counter() + self.budget
+        best = None
+        best_size = None
+        for start, block in score_outer(guesses, sample, space, 8 * n):
+            for k in range(len(block) // n):
+                size = max(Counter(block[k * n:(k + 1) * n]).values())
+                if best_size is None or size < best_size:
+                    best = guesses[start + k]
+                    best_size = size
+            if time.perf_counter() > deadline:
+                break
+        return best
+
+
+if __name__ == "__main__":  # Temps de calcul des indices d'une partie jouée avec les essais conseillés
+    import argparse
+
+    from mastermind import score_pair, GameConfig
+
+    parser = argparse.ArgumentParser(description="Temps de calcul des indices")
+    parser.add_argument("--pegs", type=int, default=4)
+    parser.add_argument("--colors", type=int, default=8)
+    parser.add_argument("--repeats", action="store_true")
+    parser.add_argument("--games", type=int, default=20)
+    args = parser.parse_args()
+
+    config = GameConfig(pegs=args.pegs, colors=args.colors, repeats=args.repeats)
+    hints = HintService(config.palette(), config, seed=0)
+    space = hints.space
+    rng = random.Random(1)
+    times = []
+    attempts = []
+    for i in range(args.games):
+        secret = space.decode(rng.randrange(space.size))
+        hints.reset()
+        for attempt in range(1, 100):
+            count, guess = hints.hint()
+            comb = space.decode(guess)
+            black, white = score_pair(comb, secret)
+            if black == space.pegs:
+                attempts.append(attempt)
+                break
+            start = time.perf_counter()
+            hints.observe(comb, black, white)
+            hints.hint()
+            times.append(time.perf_counter() - start)
+    hints.close()
+    times.sort()
+    print("%d combinaisons, %d indices : médiane %.2f ms, pire %.2f ms, %.2f essais en moyenne avec les indices" % (
+        space.size, len(times), 1e3 * times[len(times) // 2], 1e3 * times[-1], sum(attempts) / len(attempts)))
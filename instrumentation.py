@@ -0,0 +1,264 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Mesures du temps passé dans chaque étape d'une partie : validation, score, affichage, solveur, entrées/sorties
+
+import bisect
+import cProfile
+import functools
+import importlib
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Étape -> fonctions mesurées ("module:attribut"). Les temps sont inclusifs : write_answer (io) contient la
+# préparation du texte de la réponse (rendering) et son écriture. La saisie (comb_input) n'est pas mesurée : son
+# temps serait surtout celui que le joueur passe à réfléchir.
+STAGES = {
+    "validation": ["mastermind:ColorPalette.check"],
+    "scoring": ["mastermind:count_well_placed", "mastermind:count_colors"],
+    "rendering": ["mastermind:to_colors_name", "mastermind:Renderer.text", "mastermind:Renderer.payload"],
+    "solver": ["solver:Solver.choose"],
+    "io": ["mastermind:write_answer"],
+}
+# Bornes supérieures (en secondes) des classes de l'histogramme des latences, la dernière classe est +Inf
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 0.1, 1.0, 10.0)
+
+
+class Histogram:
+    """
+    Nombre d'appels, temps total et histogramme des latences d'une étape. Les fonctions mesurées peuvent tourner
+    dans plusieurs threads à la fois (par exemple celui des indices, voir hints.py) : les mises à jour sont
+    protégées par un verrou.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.count = 0
+            self.seconds = 0.0
+            self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        with self.lock:
+            self.count += 1
+            self.seconds += seconds
+            self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def read(self):
+        """
+        Renvoie (nombre d'appels, temps total, copie de l'histogramme), lus ensemble.
+        """
+        with self.lock:
+            return self.count, self.seconds, list(self.buckets)
+
+
+_histograms = {stage: Histogram() for stage in STAGES}
+_patched = []  # Liste des (objet, attribut, fonction d'origine) remplacés tant que les mesures sont actives
+
+
+def _resolve(target):
+    module, path = target.split(":")
+    owner = importlib.import_module(module)
+    names = path.split(".")
+    for name in names[:-1]:
+        owner = getattr(owner, name)
+    return owner, names[-1]
+
+
+def _timed(func, histogram):
+    clock = time.perf_counter
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.add(clock() - start)
+    return wrapper
+
+
+def enabled():
+    return bool(_patched)
+
+
+def enable(stages=None):
+    """
+    Active les mesures : les fonctions de STAGES sont remplacées par des versions chronométrées. Quand les mesures
+    sont désactivées, les fonctions d'origine sont en place et ne coûtent donc rien de plus.
+
+    Seuls les appels qui passent par le module (ou la classe) sont mesurés : une fonction importée avec
+    "from mastermind import ..." avant enable() garde sa version d'origine.
+
+    Arguments:
+    - stages (list) : étapes à mesurer. Par défaut, toutes.
+    """
+    if _patched:
+        disable()
+    for stage in (STAGES if stages is None else stages):
+        for target in STAGES[stage]:
+            owner, name = _resolve(target)
+            func = owner.__dict__[name]
+            _patched.append((owner, name, func))
+            setattr(owner, name, _timed(func, _histograms[stage]))
+
+
+def disable():
+    """
+    Remet les fonctions d'origine en place. Les mesures déjà faites sont gardées (voir reset).
+    """
+    while _patched:
+        owner, name, func = _patched.pop()
+        setattr(owner, name, func)
+
+
+def reset():
+    for histogram in _histograms.values():
+        histogram.reset()
+
+
+@contextmanager
+def instrumented(stages=None):
+    """
+    Active les mesures le temps d'un bloc with.
+
+    Exemples:
+    >>> from mastermind import Game
+    >>> game = Game(secret="bjov")
+    >>> game.start()["state"]
+    'playing'
+    >>> with instrumented(["validation"]):
+    ...     result = game.submit_guess("borv")
+    >>> snapshot()["validation"]["count"]
+    1
+    """
+    enable(stages)
+    try:
+        yield
+    finally:
+        disable()
+
+
+def snapshot():
+    """
+    Renvoie l'état des mesures.
+
+    Valeurs de retour:
+    dict. Étape -> {"count", "seconds", "mean", "buckets"} où buckets est la liste des (borne, nombre d'appels
+    cumulé) comme dans un histogramme Prometheus.
+    """
+    result = {}
+    for stage, histogram in _histograms.items():
+        calls, seconds, counts = histogram.read()
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        result[stage] = {"count": calls, "seconds": seconds, "mean": seconds / calls if calls else 0.0,
+                         "buckets": buckets}
+    return result
+
+
+def prometheus(prefix="mastermind"):
+    """
+    Renvoie les mesures au format texte de Prometheus (un histogramme mastermind_stage_seconds par étape).
+    """
+    name = prefix + "_stage_seconds"
+    lines = ["# HELP " + name + " Temps passé dans chaque étape d'une partie.", "# TYPE " + name + " histogram"]
+    for stage, stats in snapshot().items():
+        for bound, count in stats["buckets"]:
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append('%s_bucket{stage="%s",le="%s"} %d' % (name, stage, le, count))
+        lines.append('%s_sum{stage="%s"} %r' % (name, stage, stats["seconds"]))
+        lines.append('%s_count{stage="%s"} %d' % (name, stage, stats["count"]))
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def profile(path=None, memory=False, top=20):
+    """
+    Profile un bloc with avec cProfile et, si memory est vrai, suit ses allocations avec tracemalloc.
+
+    Arguments:
+    - path (str) : fichier où écrire les statistiques brutes de cProfile (lisibles avec pstats ou snakeviz).
+    - memory (bool) : True pour suivre les allocations.
+    - top (int) : nombre de lignes gardées dans les résumés.
+
+    Valeurs de retour:
+    dict. Rempli à la sortie du bloc : "profile" (résumé texte trié par temps cumulé) et, avec memory,
+    "memory" = {"current", "peak", "top"} (octets et lignes qui allouent le plus).
+
+    Exemples:
+    >>> from simulation import simulate
+    >>> with profile(memory=True) as report:
+    ...     stats = simulate(100, workers=1)
+    >>> "profile" in report, "memory" in report
+    (True, True)
+    """
+    report = {}
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        report["profile"] = stream.getvalue()
+        if path is not None:
+            profiler.dump_stats(path)
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            report["memory"] = {"current": current, "peak": peak, "top": [str(stat) for stat in statistics]}
+            if tracing:
+                tracemalloc.stop()
+
+
+if __name__ == "__main__":  # Parties jouées par le solveur contre Game, avec les mesures actives
+    import argparse
+    import random
+    from contextlib import nullcontext
+
+    import mastermind
+    from solver import Solver
+
+    parser = argparse.ArgumentParser(description="Mesures des étapes d'une partie")
+    parser.add_argument("games", type=int, nargs="?", default=200)
+    parser.add_argument("--strategy", default="minimax")
+    parser.add_argument("--profile", help="fichier où écrire le profil cProfile")
+    parser.add_argument("--memory", action="store_true", help="suivre aussi les allocations (tracemalloc)")
+    args = parser.parse_args()
+
+    colors = list(mastermind.DEFAULT_COLORS)
+    solver = Solver(colors, args.strategy)
+    session = mastermind.Game(colors, rng=random.Random(0))
+    renderer = mastermind.get_renderer(colors)
+    capture = profile(args.profile, args.memory) if args.profile or args.memory else nullcontext({})
+    with instrumented(), capture as report:
+        for i in range(args.games):
+            session.start()
+            solver.reset()
+            while session.state == "playing":
+                comb = solver.next_guess()
+                result = session.submit_guess(comb)
+                renderer.payload(session.space.encode(comb), mastermind.pack_feedback(result["black"], result["white"]))
+                solver.observe(comb, result["black"], result["white"])
+    print(prometheus(), end="")
+    if "profile" in report:
+        print(report["profile"])
+    if "memory" in report:
+        print("Mémoire : %(current)d octets, pic %(peak)d octets" % report["memory"])
+        print("\n".join(report["memory"]["top"]))
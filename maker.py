@@ -0,0 +1,291 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Mode inversé : l'ordinateur garde la solution et répond aux essais d'un ou de nombreux joueurs automatiques
+
+import sys
+from array import array
+from collections import Counter
+from itertools import compress
+
+from mastermind import get_space, get_palette, get_renderer, score_outer, score_pairs, SecretGenerator
+from solver import LRUCache
+
+READ_SIZE = 1 << 16  # Octets lus d'un coup sur l'entrée : toutes les lignes reçues sont traitées ensemble
+TRANSITION_CACHE_SIZE = 4096  # Nombre de transitions des parties evil gardées par CodeMaker
+MALFORMED = "ligne mal formée".encode("utf-8")  # Message des lignes qui ne sont ni un essai ni RESET
+
+# Protocole (une ligne par essai, les essais peuvent être envoyés sans attendre les réponses) :
+#   [<partie>] <comb>    -> [<partie>] 2B1W  (bien placés, mal placés, comme feed_back)
+#                           [<partie>] INVALID <message> ; <message> ...
+#   <partie> <mot> <mot> ... -> <partie> INVALID ligne mal formée  (les lignes vides sont ignorées)
+#   [<partie>] RESET     -> [<partie>] OK    (nouvelle solution)
+# Une partie est créée au premier essai qui la nomme ; sans nom, c'est la partie "".
+
+
+class EvilGame:
+    """
+    Partie contre un adversaire qui ne choisit pas de solution : à chaque essai, il donne la réponse que partagent
+    le plus de combinaisons encore possibles, et ne garde que celles-ci.
+
+    Les candidats sont gardés dans un array('I') : le partage d'un essai ne coûte que le nombre de candidats
+    restants, qui diminue à chaque coup.
+
+    Exemples:
+    >>> from mastermind import unpack_feedback
+    >>> game = EvilGame(get_space())
+    >>> unpack_feedback(game.answer(get_space().encode("bjov")))
+    (0, 2)
+    >>> len(game)
+    504
+    """
+
+    def __init__(self, space, alive=None, history=()):
+        self.space = space
+        self.alive = alive  # Entiers des candidats, ou None tant qu'ils le sont tous
+        self.history = history  # Essais déjà joués : deux parties de même historique ont les mêmes candidats
+
+    def __len__(self):
+        return self.space.size if self.alive is None else len(self.alive)
+
+    def partition(self, guess):
+        """
+        Renvoie les réponses codées de l'essai guess contre chaque candidat (bytes, dans l'ordre des candidats).
+        """
+        if self.alive is None:
+            return bytes(self.space.row(guess))
+        if self.space.has_table():
+            return bytes(map(self.space.row(guess).__getitem__, self.alive))
+        return next(score_outer([guess], self.alive, self.space))[1]
+
+    def answer(self, guess):
+        """
+        Renvoie la réponse codée à l'essai guess (entier) et retire les candidats qui en donneraient une autre.
+        """
+        feedbacks = self.partition(guess)
+        # La réponse la plus fréquente ; à égalité, celle qui a le moins de pions bien placés
+        feedback = max(Counter(feedbacks).items(), key=lambda item: (item[1], -item[0]))[0]
+        codes = range(self.space.size) if self.alive is None else self.alive
+        self.alive = array('I', compress(codes, map(feedback.__eq__, feedbacks)))
+        self.history += (guess,)
+        return feedback
+
+
+class CodeMaker:
+    """
+    Moteur de réponses du mode inversé, sans entrées/sorties : feed reçoit des octets (lignes du protocole, même
+    coupées n'importe où) et renvoie en un seul bytes les réponses de toutes les lignes complètes.
+
+    Les réponses des parties normales d'un même paquet de lignes sont calculées en un seul appel à score_pairs.
+    En mode evil, chaque partie est une EvilGame. Les parties qui jouent les mêmes essais (les joueurs automatiques
+    d'une même stratégie) ont les mêmes candidats : chaque transition (historique, essai) est calculée une seule
+    fois et partagée, dans un cache LRU.
+
+    Exemples:
+    >>> maker = CodeMaker(seed=1)
+    >>> maker.feed(b"a bjov\\nb rjvb\\na bj")
+    b'a 1B1W\\nb 4B0W\\n'
+    >>> maker.feed(b"ov\\n")
+    b'a 1B1W\\n'
+    >>> maker.feed(b"a bjov\\n\\na b c\\nb rjvb\\n")
+    b'a 1B1W\\na INVALID ligne mal form\\xc3\\xa9e\\nb 4B0W\\n'
+    """
+
+    def __init__(self, colors=None, config=None, evil=False, seed=None, transitions=TRANSITION_CACHE_SIZE):
+        self.space = get_space(colors, config)
+        self.config = config
+        self.palette = get_palette(colors)
+        self.compact = [text.encode("ascii") for text in get_renderer(colors, config).compact]
+        self.evil = evil
+        self.generator = SecretGenerator(self.space, seed)
+        self.games = {}  # Nom de la partie (bytes) -> entier de la solution, ou EvilGame
+        self._transitions = LRUCache(transitions)  # Mode evil : (historique, essai) -> (réponse, candidats restants)
+        self._pending = b''  # Début de ligne reçu mais pas encore terminé
+
+    def reset(self, name):
+        self.games[name] = EvilGame(self.space) if self.evil else self.generator.next()
+
+    def _evil_answer(self, game, guess):
+        key = (game.history, guess)
+        transition = self._transitions.get(key)
+        if transition is None:
+            feedback = game.answer(guess)
+            self._transitions.put(key, (feedback, game.alive))
+            return feedback
+        game.alive = transition[1]  # Les candidats ne sont jamais modifiés en place : ils peuvent être partagés
+        game.history += (guess,)
+        return transition[0]
+
+    def feed(self, data):
+        """
+        Traite des octets reçus et renvoie les réponses (bytes) de toutes les lignes complètes.
+        """
+        lines = (self._pending + data).split(b'\n')
+        self._pending = lines.pop()
+        return self.answer_lines(lines)
+
+    def close(self):
+        """
+        Renvoie la réponse à une dernière ligne sans retour à la ligne (fin de l'entrée).
+        """
+        pending, self._pending = self._pending, b''
+        return self.answer_lines([pending])
+
+    def answer_lines(self, lines):
+        out = []
+        waiting = []  # Indices dans out des réponses des parties normales, calculées ensemble à la fin
+        guesses = array('I')
+        secrets = array('I')
+        for line in lines:
+            parts = line.split()
+            if not parts:  # Ligne vide
+                continue
+            if len(parts) > 2:
+                out.append(parts[0] + b' INVALID ' + MALFORMED + b'\n')
+                continue
+            name = parts[0] if len(parts) == 2 else b''
+            prefix = name + b' ' if name else b''
+            comb = parts[-1].decode("ascii", "replace").lower()
+            if comb == "reset":
+                self.reset(name)
+                out.append(prefix + b'OK\n')
+                continue
+            errors = self.palette.check(comb, self.config)
+            if errors:
+                messages = " ; ".join(self.palette.messages(errors, self.config))
+                out.append(prefix + b'INVALID ' + messages.encode("utf-8") + b'\n')
+                continue
+            if name not in self.games:
+                self.reset(name)
+            game = self.games[name]
+            guess = self.space.encode(comb)
+            if self.evil:
+                out.append(prefix + self.compact[self._evil_answer(game, guess)] + b'\n')
+            else:
+                waiting.append(len(out))
+                out.append(prefix)
+                guesses.append(guess)
+                secrets.append(game)
+        if waiting:
+            feedbacks = score_pairs(guesses, secrets, self.space)
+            compact = self.compact
+            for i, feedback in zip(waiting, feedbacks):
+                out[i] += compact[feedback] + b'\n'
+        return b''.join(out)
+
+
+def serve_stream(maker, infile=None, outfile=None):
+    """
+    Répond aux lignes de infile (par défaut, l'entrée standard) sur outfile (par défaut, la sortie standard)
+    jusqu'à la fin de l'entrée : tout ce qui est disponible est lu, traité puis écrit en un seul appel.
+    """
+    infile = sys.stdin.buffer if infile is None else infile
+    outfile = sys.stdout.buffer if outfile is None else outfile
+    read = getattr(infile, "read1", infile.read)
+    while True:
+        data = read(READ_SIZE)
+        if not data:
+            break
+        answer = maker.feed(data)
+        if answer:
+            outfile.write(answer)
+            outfile.flush()
+    outfile.write(maker.close())
+    outfile.flush()
+
+
+async def serve(host="127.0.0.1", port=7778, colors=None, config=None, evil=False, seed=None):
+    """
+    Serveur TCP du mode inversé : un CodeMaker (et ses parties) par connexion.
+    """
+    connections = [0]
+
+    async def handle_client(reader, writer):
+        connections[0] += 1
+        maker = CodeMaker(colors, config, evil, None if seed is None else "%d:%d" % (seed, connections[0]))
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    writer.write(maker.close())
+                    break
+                writer.write(maker.feed(data))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    import asyncio
+
+    server = await asyncio.start_server(handle_client, host, port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def play_batch(maker, games, strategy="first", colors=None, config=None, tries=None):
+    """
+    Joue games parties simultanées contre maker avec le solveur : à chaque tour, un essai par partie en cours est
+    envoyé dans le même paquet de lignes.
+
+    Valeurs de retour:
+    Counter. Nombre d'essais utilisés -> nombre de parties (0 : partie non terminée après tries essais).
+    """
+    from solver import Solver
+
+    pegs = maker.space.pegs
+    win = ("%dB0W" % pegs).encode("ascii")
+    solvers = {}
+    for i in range(games):
+        name = b'%d' % i
+        solvers[name] = Solver(colors, strategy, config)
+        maker.feed(name + b' RESET\n')
+    histogram = Counter()
+    attempts = 0
+    while solvers and (tries is None or attempts < tries):
+        attempts += 1
+        guesses = {name: solver.next_guess() for name, solver in solvers.items()}
+        request = b''.join(name + b' ' + comb.encode("ascii") + b'\n' for name, comb in guesses.items())
+        for line in maker.feed(request).splitlines():
+            name, answer = line.split()
+            if answer == win:
+                histogram[attempts] += 1
+                del solvers[name]
+            else:
+                black, white = answer[:-1].split(b'B')
+                solvers[name].observe(guesses[name], int(black), int(white))
+    if solvers:
+        histogram[0] += len(solvers)
+    return histogram
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Mastermind : l'ordinateur répond aux essais")
+    parser.add_argument("mode", choices=["stdio", "serve", "selftest"],
+                        help="stdio : lignes sur l'entrée standard ; serve : serveur TCP ; "
+                             "selftest : parties du solveur contre le moteur")
+    parser.add_argument("--evil", action="store_true", help="adversaire qui garde le plus de candidats possible")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7778)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--strategy", default="first")
+    args = parser.parse_args()
+
+    import asyncio
+
+    if args.mode == "stdio":
+        serve_stream(CodeMaker(evil=args.evil, seed=args.seed))
+    elif args.mode == "serve":
+        asyncio.run(serve(args.host, args.port, evil=args.evil, seed=args.seed))
+    else:
+        start = time.perf_counter()
+        histogram = play_batch(CodeMaker(evil=args.evil, seed=args.seed), args.games, args.strategy)
+        seconds = time.perf_counter() - start
+        print("%d parties en %.2f s (%.0f parties/s)" % (args.games, seconds, args.games / seconds))
+        for attempts, count in sorted(histogram.items()):
+            print("   ", attempts, "essai(s) :", count)
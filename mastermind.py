@@ -4,13 +4,901 @@
 
 # Jeu du Mastermind
 
-def generate_guess(colors):
+import sys
+from array import array
+from collections import Counter
+from itertools import chain, compress, islice, permutations, product, repeat
+from operator import add, mul
+
+DEFAULT_COLORS = [("r", "rouge"), ("j", "jaune"), ("v", "vert"), ("b", "bleu"), ("o", "orange"), ("c", "blanc"),
+                  ("t", "violet"), ("f", "fuchsia")]  # Base de donnée des couleurs utilisée par mastermind()
+PALETTE = DEFAULT_COLORS + [("g", "gris"), ("m", "marron"), ("n", "noir"),
+                            ("k", "kaki")]  # Couleurs disponibles pour les variantes à plus de 8 couleurs
+PEGS = 4  # Nombre de pions d'une combinaison
+TRIES = 10  # Nombre d'essais d'une partie
+TABLE_LIMIT = 4096  # Au-delà de ce nombre de combinaisons, on ne garde plus la table complète des réponses en mémoire
+COMPACT_LIMIT = 100000  # Au-delà de ce nombre de combinaisons, on ne garde plus la liste des strings
+CHUNK_BYTES = 1 << 22  # Taille maximale (en octets) d'un bloc de réponses renvoyé par score_outer
+HINT_WAIT = 0.05  # Temps (en secondes) pendant lequel game() attend l'indice avant de poser la question
+
+# Tables de traduction (bytes.translate), construites par concaténation plutôt qu'octet par octet pour ne pas
+# ralentir l'import : _EQUAL[c] transforme l'octet c en 1 et tous les autres en 0
+_EQUAL = [bytes(c) + b'\x01' + bytes(255 - c) for c in range(256)]
+# _MINIMUM[k] transforme l'octet v en min(v, k)
+_MINIMUM = [bytes(range(k)) + bytes([k]) * (256 - k) for k in range(256)]
+
+
+def pack_feedback(black, white, pegs=PEGS):
+    """
+    Code la réponse (bien placés, mal placés) en un seul entier.
+
+    Arguments:
+    - black (int) : nombre de pions bien placés.
+    - white (int) : nombre de pions de bonne couleur mais mal placés.
+    - pegs (int) : nombre de pions d'une combinaison.
+
+    Valeurs de retour:
+    int. Retourne black * (pegs + 1) + white.
+
+    Exemples:
+    >>> pack_feedback(1, 2)
+    7
+    """
+    return black * (pegs + 1) + white
+
+
+def unpack_feedback(feedback, pegs=PEGS):
+    """
+    Décode une réponse produite par pack_feedback.
+
+    Arguments:
+    - feedback (int) : réponse codée.
+    - pegs (int) : nombre de pions d'une combinaison.
+
+    Valeurs de retour:
+    tuple. Retourne le tuple (bien placés, mal placés).
+
+    Exemples:
+    >>> unpack_feedback(7)
+    (1, 2)
+    """
+    return divmod(feedback, pegs + 1)
+
+
+class GameConfig:
+    """
+    Paramètres d'une variante du jeu : nombre de pions, nombre de couleurs, répétitions permises et nombre d'essais.
+
+    Exemples:
+    >>> config = GameConfig(pegs=5, colors=10, repeats=True)
+    >>> config.space_size()
+    100000
+    >>> len(config.palette())
+    10
+    """
+
+    def __init__(self, pegs=PEGS, colors=len(DEFAULT_COLORS), repeats=False, tries=TRIES):
+        if not 1 <= pegs <= 15:  # Les réponses doivent tenir dans un octet (voir CodeSpace.compute_row)
+            raise ValueError("Le nombre de pions doit être compris entre 1 et 15")
+        if not repeats and colors < pegs:
+            raise ValueError("Il faut au moins autant de couleurs que de pions sans répétition")
+        self.pegs = pegs
+        self.colors = colors
+        self.repeats = repeats
+        self.tries = tries
+
+    def key(self):
+        return self.pegs, self.colors, self.repeats, self.tries
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return "GameConfig(pegs=%d, colors=%d, repeats=%s, tries=%d)" % self.key()
+
+    def palette(self):
+        """
+        Renvoie une nouvelle liste des self.colors premières couleurs de PALETTE.
+        """
+        if self.colors > len(PALETTE):
+            raise ValueError("PALETTE ne contient que " + str(len(PALETTE)) + " couleurs")
+        return PALETTE[:self.colors]
+
+    def space_size(self, n_colors=None):
+        """
+        Renvoie le nombre de combinaisons possibles avec n_colors couleurs (par défaut self.colors).
+        """
+        if n_colors is None:
+            n_colors = self.colors
+        if self.repeats:
+            return n_colors ** self.pegs
+        size = 1
+        for i in range(self.pegs):
+            size *= n_colors - i
+        return size
+
+
+DEFAULT_CONFIG = GameConfig()
+
+
+def score_batch(guess, codes, pegs=PEGS):
+    """
+    Calcule d'un coup la réponse codée de l'essai guess contre un tableau de combinaisons.
+
+    Les combinaisons sont des entiers de couleurs (un octet par pion, comme CodeSpace.digits). Chaque octet d'un
+    grand entier Python sert de compteur pour une combinaison : les additions d'entiers comptent donc les pions de
+    toutes les combinaisons à la fois, sans boucle Python sur les combinaisons. Les couleurs répétées sont comptées
+    comme des multiensembles (min des nombres d'apparitions de chaque couleur).
+
+    Arguments:
+    - guess (bytes) : les pegs couleurs de l'essai.
+        exemple : bytes([0, 1, 2, 3])
+    - codes (bytes) : N combinaisons mises bout à bout (N * pegs octets, bytes, bytearray ou array('B')).
+    - pegs (int) : nombre de pions d'une combinaison.
+
+    Valeurs de retour:
+    bytes. N octets, l'octet i vaut pack_feedback(bien placés, mal placés) pour la combinaison i.
+
+    Exemples:
+    >>> score_batch(bytes([0, 1, 2, 3]), bytes([0, 2, 1, 4, 3, 2, 1, 0]))
+    b'\\x07\\x04'
+    """
+    codes = bytes(codes)
+    size = len(codes) // pegs
+    columns = [codes[p::pegs] for p in range(pegs)]
+    black = 0
+    common = 0
+    for p in range(pegs):
+        black += int.from_bytes(columns[p].translate(_EQUAL[guess[p]]), 'little')
+    for color in set(guess):
+        count = 0  # Nombre d'apparitions de color dans chaque combinaison
+        for column in columns:
+            count += int.from_bytes(column.translate(_EQUAL[color]), 'little')
+        # Une couleur ne compte qu'autant de fois qu'elle apparaît dans l'essai
+        count = count.to_bytes(size, 'little').translate(_MINIMUM[guess.count(color)])
+        common += int.from_bytes(count, 'little')
+    # bien placés * (pegs + 1) + mal placés == bien placés * pegs + couleurs communes
+    return (black * pegs + common).to_bytes(size, 'little')
+
+
+def split_feedback(packed, pegs=PEGS):
+    """
+    Sépare un tableau de réponses codées (score_batch) en deux tableaux.
+
+    Arguments:
+    - packed (bytes) : réponses codées.
+    - pegs (int) : nombre de pions d'une combinaison.
+
+    Valeurs de retour:
+    tuple. (bien placés, mal placés), deux bytes de même longueur que packed.
+    """
+    blacks, whites = _split_tables(pegs)
+    return packed.translate(blacks), packed.translate(whites)
+
+
+def feedback_mask(packed, feedback):
+    """
+    Renvoie le masque des réponses codées de packed qui valent feedback, à passer à itertools.compress pour ne
+    garder que les combinaisons qui donnent cette réponse.
+
+    Arguments:
+    - packed (bytes) : réponses codées (score_batch, CodeSpace.row...).
+    - feedback (int) : réponse codée recherchée (voir pack_feedback).
+
+    Valeurs de retour:
+    bytes. Même longueur que packed : 1 là où la réponse vaut feedback, 0 ailleurs.
+
+    Exemples:
+    >>> feedback_mask(bytes([7, 4, 7]), 7)
+    b'\\x01\\x00\\x01'
+    """
+    return packed.translate(_EQUAL[feedback])
+
+
+_split = {}  # Tables de traduction de split_feedback, par nombre de pions
+
+
+def _split_tables(pegs):
+    if pegs not in _split:
+        _split[pegs] = (bytes(min(v // (pegs + 1), 255) for v in range(256)),
+                        bytes(v % (pegs + 1) for v in range(256)))
+    return _split[pegs]
+
+
+class CodeSpace:
+    """
+    Ensemble de toutes les combinaisons possibles pour un alphabet de couleurs, chacune codée par un entier.
+
+    Les combinaisons sont numérotées dans l'ordre lexicographique des symboles triés : l'encodage ne dépend donc
+    pas de l'ordre de la liste colors. Les chiffres de toutes les combinaisons sont
+    rangés dans un seul bytes (un octet par pion) et la réponse de chaque paire (essai, solution) est stockée dans
+    une table array('B') construite paresseusement, une ligne par essai.
+    Pour les grands espaces (plus de COMPACT_LIMIT combinaisons), on ne garde ni la liste des strings ni le
+    dictionnaire inverse : l'encodage et le décodage sont alors calculés, et les chiffres de toutes les
+    combinaisons (digits, columns, color_counts) ne sont construits qu'au premier besoin.
+
+    Exemples:
+    >>> space = CodeSpace("bjorv")
+    >>> space.decode(space.encode("bjov"))
+    'bjov'
+    >>> space.feedback(space.encode("borv"), space.encode("bjov"))
+    11
+    """
+
+    def __init__(self, symbols, config=DEFAULT_CONFIG):
+        self.symbols = ''.join(sorted(set(symbols)))  # On trie l'alphabet pour avoir un encodage stable
+        self.config = config
+        self.pegs = pegs = config.pegs
+        self.repeats = config.repeats
+        self.size = config.space_size(len(self.symbols))
+        self._digit = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._digits = None
+
+        if self.size <= COMPACT_LIMIT:
+            self._build_digits()
+            self.codes = [self._to_str(self.code_digits(i)) for i in range(self.size)]
+            self.index = {code: i for i, code in enumerate(self.codes)}  # symbole -> entier
+        else:  # Les millions de strings coûteraient bien plus cher que les digits
+            self.codes = None
+            self.index = None
+
+        if self.size <= TABLE_LIMIT:  # La table complète ne tient en mémoire que pour les petits espaces
+            self._table = array('B', bytes(self.size * self.size))
+            self._built = bytearray(self.size)  # 1 si la ligne de l'essai a déjà été calculée
+        else:
+            self._table = None
+            self._built = None
+
+    def _build_digits(self):
+        pegs = self.pegs
+        if self.repeats:
+            tuples = product(range(len(self.symbols)), repeat=pegs)
+        else:
+            tuples = permutations(range(len(self.symbols)), pegs)
+        self._digits = bytes(chain.from_iterable(tuples))  # Les chiffres, pion par pion
+        self._columns = [self._digits[p::pegs] for p in range(pegs)]  # La couleur de chaque combinaison en position p
+        # Pour chaque couleur, le nombre de fois qu'elle apparaît dans chaque combinaison (un octet par combinaison)
+        self._color_counts = [self._count_color(c) for c in range(len(self.symbols))]
+
+    @property
+    def digits(self):
+        if self._digits is None:
+            self._build_digits()
+        return self._digits
+
+    @property
+    def columns(self):
+        if self._digits is None:
+            self._build_digits()
+        return self._columns
+
+    @property
+    def color_counts(self):
+        if self._digits is None:
+            self._build_digits()
+        return self._color_counts
+
+    def code_columns(self, codes):
+        """
+        Renvoie les couleurs des combinaisons codes position par position : une bytes par pion, un octet par
+        combinaison. Les chiffres de tout l'espace ne sont pas construits s'ils ne le sont pas déjà : la mémoire
+        ne dépend que du nombre de combinaisons demandées.
+        """
+        if self._digits is not None:
+            return [bytes(map(column.__getitem__, codes)) for column in self._columns]
+        digits = b''.join(map(self.code_digits, codes))
+        return [digits[p::self.pegs] for p in range(self.pegs)]
+
+    def _count_color(self, color):
+        total = 0
+        for column in self.columns:
+            total += int.from_bytes(column.translate(_EQUAL[color]), 'little')
+        return total.to_bytes(self.size, 'little')
+
+    def _to_str(self, digits):
+        return ''.join(self.symbols[d] for d in digits)
+
+    def has_table(self):
+        """
+        Renvoie True si les réponses de l'espace sont gardées dans une table.
+        """
+        return self._table is not None
+
+    def table_complete(self):
+        """
+        Renvoie True si toutes les lignes de la table sont calculées.
+        """
+        return self._table is not None and self._built.count(0) == 0
+
+    def attach_table(self, table):
+        """
+        Remplace la table par table, complète et en lecture seule (par exemple la projection en mémoire d'un
+        instantané, voir snapshot.py).
+        """
+        if self._table is None or len(table) != self.size * self.size:
+            raise ValueError("Table de taille incorrecte pour cet espace")
+        self._table = table
+        self._built = b'\x01' * self.size  # Toutes les lignes sont calculées : row ne l'écrit jamais
+
+    def detach_table(self):
+        """
+        Oublie la table (par exemple avant de fermer la mémoire partagée qui la contient) : les réponses sont
+        ensuite calculées directement, comme pour un grand espace.
+        """
+        self._table = None
+        self._built = None
+
+    def find(self, comb):
+        """
+        Renvoie l'entier associé à la combinaison comb, ou None si elle n'appartient pas à l'espace.
+        """
+        if self.index is not None:
+            return self.index.get(comb)
+        if len(comb) != self.pegs:
+            return None
+        n = len(self.symbols)
+        remaining = list(range(n))
+        code = 0
+        for p, symbol in enumerate(comb):
+            digit = self._digit.get(symbol)
+            if digit is None:
+                return None
+            if self.repeats:  # Numération en base n
+                code = code * n + digit
+            else:  # Rang de la couleur parmi celles encore libres (code de Lehmer)
+                if digit not in remaining:
+                    return None
+                code = code * (n - p) + remaining.index(digit)
+                remaining.remove(digit)
+        return code
+
+    def encode(self, comb):
+        """
+        Renvoie l'entier associé à la combinaison comb (KeyError si elle n'appartient pas à l'espace).
+        """
+        code = self.find(comb)
+        if code is None:
+            raise KeyError(comb)
+        return code
+
+    def decode(self, code):
+        """
+        Renvoie la combinaison (str) associée à l'entier code.
+        """
+        if self.codes is not None:
+            return self.codes[code]
+        return self._to_str(self.code_digits(code))
+
+    def code_digits(self, code):
+        """
+        Renvoie les couleurs (bytes, un octet par pion) de la combinaison d'entier code, pour score_batch.
+        """
+        if self._digits is not None:
+            return self._digits[code * self.pegs:(code + 1) * self.pegs]
+        n = len(self.symbols)
+        digits = []
+        for p in range(self.pegs - 1, -1, -1):  # Chiffres de poids faible d'abord
+            radix = n if self.repeats else n - p
+            digits.append(code % radix)
+            code //= radix
+        digits.reverse()
+        if not self.repeats:  # Rangs parmi les couleurs encore libres -> couleurs
+            remaining = list(range(n))
+            digits = [remaining.pop(rank) for rank in digits]
+        return bytes(digits)
+
+    def compute_row(self, guess):
+        """
+        Calcule la réponse codée de l'essai guess (entier) contre toutes les combinaisons de l'espace.
+
+        Chaque octet d'un grand entier sert de compteur indépendant : une addition d'entiers Python compte
+        donc les pions de toutes les combinaisons à la fois, sans boucle Python sur les combinaisons.
+
+        Valeurs de retour:
+        bytes. L'octet d'indice j vaut pack_feedback(bien placés, mal placés) pour la solution j.
+        """
+        return _score_columns(self.code_digits(guess), self.columns, self.color_counts, self.size)
+
+    def row(self, guess):
+        """
+        Renvoie la ligne de réponses de l'essai guess, en la calculant et la stockant à la première demande.
+        """
+        if self._table is None:
+            return self.compute_row(guess)
+        start = guess * self.size
+        if not self._built[guess]:
+            self._table[start:start + self.size] = array('B', self.compute_row(guess))
+            self._built[guess] = 1
+        return memoryview(self._table)[start:start + self.size]
+
+    def feedback(self, guess, secret):
+        """
+        Renvoie la réponse codée de l'essai guess contre la solution secret (tous deux des entiers).
+        """
+        if self._table is None:  # Pas de table : on compare directement les deux combinaisons
+            black, white = score_pair(self.code_digits(guess), self.code_digits(secret))
+            return pack_feedback(black, white, self.pegs)
+        if not self._built[guess]:
+            self.row(guess)
+        return self._table[guess * self.size + secret]
+
+
+def _column_counts(columns, colors, size):
+    # Pour chaque couleur, son nombre d'apparitions dans chacune des size combinaisons (un octet par combinaison)
+    counts = []
+    for color in range(colors):
+        total = sum(int.from_bytes(column.translate(_EQUAL[color]), 'little') for column in columns)
+        counts.append(total.to_bytes(size, 'little'))
+    return counts
+
+
+def _score_columns(digits, columns, color_counts, size):
+    """
+    Réponses codées de l'essai digits contre size combinaisons données par leurs colonnes (la couleur de chaque
+    combinaison en position p) et leurs nombres d'apparitions de chaque couleur (voir CodeSpace).
+    """
+    pegs = len(digits)
+    black = 0
+    common = 0
+    for p in range(pegs):
+        black += int.from_bytes(columns[p].translate(_EQUAL[digits[p]]), 'little')
+    for color in set(digits):
+        # Une couleur ne compte qu'autant de fois qu'elle apparaît dans l'essai
+        common += int.from_bytes(color_counts[color].translate(_MINIMUM[digits.count(color)]), 'little')
+    # bien placés * (pegs + 1) + mal placés == bien placés * pegs + couleurs communes
+    return (black * pegs + common).to_bytes(size, 'little')
+
+
+_spaces = {}  # Cache des espaces déjà construits, indexés par (alphabet trié, nombre de pions, répétitions)
+
+
+def get_space(colors=None, config=None):
+    """
+    Renvoie l'espace des combinaisons associé à la liste colors, construit une seule fois par alphabet.
+
+    Arguments:
+    - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
+        Par défaut, DEFAULT_COLORS.
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+
+    Valeurs de retour:
+    CodeSpace. L'espace des combinaisons.
     """
-    Génère une combinaison aléatoire de 4 couleurs prises dans le tuple colors.
+    if colors is None:
+        colors = DEFAULT_COLORS
+    if config is None:
+        config = DEFAULT_CONFIG
+    key = (''.join(sorted(symbol for symbol, name in colors)), config.pegs, config.repeats)
+    space = _spaces.get(key)
+    if space is None:
+        space = _spaces[key] = CodeSpace(key[0], config)
+    return space
+
+
+_pair_min = {}  # Tables de traduction de score_pairs, par nombre de pions
+
+
+def _pair_min_table(pegs):
+    # L'octet a * (pegs + 1) + b devient min(a, b)
+    if pegs not in _pair_min:
+        _pair_min[pegs] = bytes(min(v // (pegs + 1), v % (pegs + 1)) for v in range(256))
+    return _pair_min[pegs]
+
+
+def score_pairs(guesses, secrets, space=None):
+    """
+    Calcule d'un coup les réponses codées de nombreuses paires (essai, solution), par exemple tous les coups d'un
+    journal de parties.
+
+    Pour un petit espace, les réponses sont lues dans la table de l'espace (les lignes des essais manquantes sont
+    calculées une fois). Pour un grand espace, on compare pion par pion puis couleur par couleur (min des nombres
+    d'apparitions) toutes les paires à la fois, un octet par paire comme dans score_batch.
+
+    Arguments:
+    - guesses (list) : entiers des essais (list, array('I'), range...).
+    - secrets (list) : entiers des solutions, autant que d'essais.
+    - space (CodeSpace) : espace des combinaisons. Par défaut, celui de DEFAULT_COLORS.
+
+    Valeurs de retour:
+    bytes. L'octet i vaut pack_feedback(bien placés, mal placés) pour la paire (guesses[i], secrets[i]).
+
+    Exemples:
+    >>> space = get_space()
+    >>> score_pairs([space.encode("borv"), 0], [space.encode("bjov"), 0], space)
+    b'\\x0b\\x14'
+    """
+    if space is None:
+        space = get_space()
+    if len(guesses) != len(secrets):
+        raise ValueError("Il faut autant d'essais que de solutions")
+    size = len(guesses)
+    if space.has_table():
+        for guess in set(guesses):
+            space.row(guess)  # Calcule la ligne si elle manque
+        return bytes(map(space._table.__getitem__, map(add, map(mul, guesses, repeat(space.size)), secrets)))
+
+    pegs = space.pegs
+    # Les couleurs de chaque position, pour les essais et pour les solutions (un octet par paire)
+    guess_columns = space.code_columns(guesses)
+    secret_columns = space.code_columns(secrets)
+    black = 0
+    for guess_column, secret_column in zip(guess_columns, secret_columns):
+        # Un octet nul du ou exclusif = même couleur à la même position
+        same = int.from_bytes(guess_column, 'little') ^ int.from_bytes(secret_column, 'little')
+        black += int.from_bytes(same.to_bytes(size, 'little').translate(_EQUAL[0]), 'little')
+    common = 0
+    minimum = _pair_min_table(pegs)
+    for color in range(len(space.symbols)):
+        table = _EQUAL[color]
+        guess_count = sum(int.from_bytes(column.translate(table), 'little') for column in guess_columns)
+        secret_count = sum(int.from_bytes(column.translate(table), 'little') for column in secret_columns)
+        # Les deux nombres d'apparitions dans un même octet (a * (pegs + 1) + b), puis min(a, b) par table
+        both = guess_count * (pegs + 1) + secret_count
+        common += int.from_bytes(both.to_bytes(size, 'little').translate(minimum), 'little')
+    return (black * pegs + common).to_bytes(size, 'little')
+
+
+def score_outer(guesses, secrets, space=None, chunk_bytes=CHUNK_BYTES):
+    """
+    Calcule les réponses codées de chaque essai de guesses contre chaque solution de secrets, par blocs de lignes
+    pour borner la mémoire.
+
+    Arguments:
+    - guesses (list) : entiers des essais.
+    - secrets (list) : entiers des solutions.
+    - space (CodeSpace) : espace des combinaisons. Par défaut, celui de DEFAULT_COLORS.
+    - chunk_bytes (int) : taille maximale d'un bloc (au moins une ligne par bloc).
+
+    Valeurs de retour:
+    Un générateur de tuples (start, block) : block contient les lignes des essais guesses[start:start + k] mises
+    bout à bout, chacune de len(secrets) octets.
+
+    Exemples:
+    >>> space = get_space()
+    >>> [(start, len(block)) for start, block in score_outer(range(10), range(1000), space, 4000)]
+    [(0, 4000), (4, 4000), (8, 2000)]
+    >>> list(score_outer([], [], space))
+    []
+    """
+    if space is None:
+        space = get_space()
+    n = len(secrets)
+    rows = max(1, chunk_bytes // n) if n else max(1, len(guesses))
+    whole = isinstance(secrets, range) and secrets == range(space.size)  # Toutes les solutions, dans l'ordre
+    if space.has_table() or whole:
+        getter = None if whole else (lambda row: bytes(map(row.__getitem__, secrets)))
+    else:  # On extrait une seule fois les colonnes et les nombres d'apparitions des solutions
+        columns = space.code_columns(secrets)
+        color_counts = _column_counts(columns, len(space.symbols), n)
+    for start in range(0, len(guesses), rows):
+        block = bytearray()
+        for guess in islice(guesses, start, start + rows):
+            if space.has_table() or whole:
+                row = space.row(guess)
+                block += row if getter is None else getter(row)
+            else:
+                block += _score_columns(space.code_digits(guess), columns, color_counts, n)
+        yield start, bytes(block)
+
+
+class CandidateSet:
+    """
+    Ensemble des combinaisons encore possibles, stocké comme un masque d'un octet par combinaison (1 si la
+    combinaison est candidate) dans l'ordre des entiers du CodeSpace. Aucun objet n'est créé par combinaison :
+    filtrer, compter et parcourir se font sur le masque entier.
+
+    Exemples:
+    >>> space = get_space()
+    >>> candidates = CandidateSet(space)
+    >>> len(candidates)
+    1680
+    >>> candidates.filter(space.encode("bcjo"), pack_feedback(4, 0))
+    >>> list(candidates) == [space.encode("bcjo")]
+    True
+    """
+
+    def __init__(self, space, mask=None):
+        self.space = space
+        self._mask = b'\x01' * space.size if mask is None else bytes(mask)
+        self._len = self._mask.count(1)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return compress(range(self.space.size), self._mask)  # Les entiers des candidats, dans l'ordre
+
+    def __contains__(self, code):
+        return self._mask[code] == 1
+
+    def copy(self):
+        """
+        Renvoie une copie indépendante de l'ensemble.
+        """
+        return CandidateSet(self.space, self._mask)
+
+    def key(self):
+        """
+        Renvoie le masque (bytes) : deux ensembles du même espace sont égaux si et seulement si leurs clés le sont.
+        """
+        return self._mask
+
+    def filter(self, guess, feedback):
+        """
+        Ne garde que les candidats qui donnent la réponse codée feedback à l'essai guess (entier).
+        """
+        row = self.space.row(guess)
+        if not isinstance(row, bytes):
+            row = bytes(row)
+        same = int.from_bytes(row.translate(_EQUAL[feedback]), 'little')
+        self._mask = (int.from_bytes(self._mask, 'little') & same).to_bytes(self.space.size, 'little')
+        self._len = self._mask.count(1)
+
+    def sample(self, rng=None):
+        """
+        Renvoie un candidat tiré uniformément au hasard (avec le random.Random rng, ou le module random).
+        """
+        if not self._len:
+            raise IndexError("Aucun candidat")
+        if rng is None:
+            import random as rng
+        return next(islice(iter(self), rng.randrange(self._len), None))
+
+
+def score_pair(guess, comb):
+    """
+    Compare deux combinaisons pion par pion, en comptant les couleurs répétées comme des multiensembles.
+
+    Arguments:
+    - guess (str ou bytes) : combinaison auquel on compare comb.
+    - comb (str ou bytes) : combinaison à comparer à guess.
+
+    Valeurs de retour:
+    tuple. (bien placés, mal placés).
+
+    Exemples:
+    >>> score_pair("bbjj", "jbbr")
+    (1, 2)
+    """
+    black = 0
+    for i in range(len(guess)):
+        if comb[i] == guess[i]:
+            black += 1
+    guess_count = Counter(guess)  # Histogramme des couleurs de chaque combinaison
+    comb_count = Counter(comb)
+    common = 0
+    for color, count in comb_count.items():
+        common += min(count, guess_count[color])
+    return black, common - black
+
+
+def lookup_feedback(guess, comb, space=None):
+    """
+    Cherche dans la table la réponse de comb contre guess.
+
+    Arguments:
+    - guess (str) : string d'une combinaison auquel on compare comb.
+    - comb (str) : string d'une combinaison à comparer à guess.
+    - space (CodeSpace) : espace dans lequel chercher. Par défaut, celui de DEFAULT_COLORS.
+
+    Valeurs de retour:
+    tuple ou None. (bien placés, mal placés), ou None si une des combinaisons n'appartient pas à l'espace ou si
+    l'espace n'a pas de table.
+    """
+    if space is None:
+        space = get_space()
+    if space.index is None or space._table is None:
+        return None
+    i = space.index.get(guess)
+    j = space.index.get(comb)
+    if i is None or j is None:
+        return None
+    return unpack_feedback(space.feedback(i, j), space.pegs)
+
+
+# Codes d'erreur de validation (des bits, une combinaison peut en cumuler plusieurs)
+ERROR_LENGTH = 1  # Mauvaise longueur
+ERROR_COLOR = 2  # Symbole qui n'est pas une couleur de la palette
+ERROR_LETTER = 4  # Caractère qui n'est pas une lettre
+ERROR_REPEAT = 8  # Couleur répétée alors que la variante l'interdit
+
+# Messages d'erreur en français, dans l'ordre où le jeu les affiche
+ERROR_MESSAGES = [
+    (ERROR_LENGTH, "Veuillez entrer une combinaison de longueur %d !"),
+    (ERROR_COLOR, "Veuillez entrer une combinaison de couleurs existantes !"),
+    (ERROR_LETTER, "Veuillez n'utiliser que des lettres !"),
+    (ERROR_REPEAT, "Veuillez entrer une combinaison de couleurs différentes !"),
+]
+
+
+class ColorPalette:
+    """
+    Index des couleurs d'une liste colors, construit une seule fois : ensemble des symboles valides, et pour chaque
+    symbole son entier (dans l'ordre des symboles triés, comme CodeSpace) et son nom.
+
+    Exemples:
+    >>> palette = ColorPalette([("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
+    >>> palette.check("bjov")
+    0
+    >>> palette.check("bjo2") == ERROR_COLOR | ERROR_LETTER
+    True
+    >>> palette.messages(palette.check("bjo2"))
+    ['Veuillez entrer une combinaison de couleurs existantes !', "Veuillez n'utiliser que des lettres !"]
+    """
+
+    def __init__(self, colors):
+        self.symbols = frozenset(symbol for symbol, name in colors)
+        self.index = {symbol: i for i, symbol in enumerate(sorted(self.symbols))}  # symbole -> entier
+        self.names = {symbol: name for symbol, name in colors}  # symbole -> nom
+        self._not_letters = frozenset(symbol for symbol in self.symbols if not symbol.isalpha())
+
+    def check(self, comb, config=None):
+        """
+        Vérifie en un seul passage la longueur, les couleurs et les répétitions de comb.
+
+        Arguments:
+        - comb (str) : string d'une combinaison.
+        - config (GameConfig) : variante du jeu (longueur, répétitions permises). Par défaut, DEFAULT_CONFIG.
+
+        Valeurs de retour:
+        int. 0 si la combinaison est valide, sinon une combinaison des bits ERROR_*.
+        """
+        if config is None:
+            config = DEFAULT_CONFIG
+        errors = 0 if len(comb) == config.pegs else ERROR_LENGTH
+        if not comb:  # Comme str.isalpha, une combinaison vide n'est pas faite de lettres
+            errors |= ERROR_LETTER
+        index = self.index
+        seen = 0  # Un bit par couleur déjà vue
+        others = None  # Caractères hors de la palette déjà vus (rare : seulement pour une combinaison fausse)
+        for symbol in comb:
+            digit = index.get(symbol)
+            if digit is None:
+                errors |= ERROR_COLOR
+                if not symbol.isalpha():
+                    errors |= ERROR_LETTER
+                if others is None:
+                    others = set()
+                elif symbol in others:
+                    errors |= ERROR_REPEAT
+                others.add(symbol)
+                continue
+            if symbol in self._not_letters:
+                errors |= ERROR_LETTER
+            if seen >> digit & 1:
+                errors |= ERROR_REPEAT
+            seen |= 1 << digit
+        if config.repeats:
+            errors &= ~ERROR_REPEAT
+        return errors
+
+    def messages(self, errors, config=None):
+        """
+        Traduit des codes d'erreur de check en messages français (couche de présentation).
+
+        Valeurs de retour:
+        list. Les messages, dans l'ordre où le jeu les affiche.
+        """
+        pegs = DEFAULT_CONFIG.pegs if config is None else config.pegs
+        return [message % pegs if code == ERROR_LENGTH else message
+                for code, message in ERROR_MESSAGES if errors & code]
+
+
+_palettes = {}  # Cache des palettes déjà construites, indexées par l'ensemble des couleurs
+
+
+def get_palette(colors=None):
+    """
+    Renvoie la ColorPalette de la liste colors (par défaut, DEFAULT_COLORS), construite une seule fois quel que soit
+    l'ordre de la liste.
+    """
+    if colors is None:
+        colors = DEFAULT_COLORS
+    key = frozenset(colors)
+    palette = _palettes.get(key)
+    if palette is None:
+        palette = _palettes[key] = ColorPalette(colors)
+    return palette
+
+
+class Renderer:
+    """
+    Textes du jeu préparés pour une liste colors et une variante : le nom de chaque combinaison de l'espace
+    (calculé une seule fois) et chaque réponse possible, en français et au format compact "2B1W". La réponse à un
+    essai est alors une seule concaténation, écrite en un seul appel.
+
+    Exemples:
+    >>> renderer = get_renderer()
+    >>> renderer.name(get_space().encode("bjov"))
+    'bleu, jaune, orange, vert'
+    >>> renderer.payload(get_space().encode("bjov"), pack_feedback(2, 1), compact=True)
+    b'2B1W\\n'
+    """
+
+    def __init__(self, colors=None, config=None):
+        self.space = get_space(colors, config)
+        self.palette = get_palette(colors)
+        self.names = None  # Nom de chaque combinaison, par entier (construit au premier besoin)
+        self._heads = {}  # entier -> ligne "Vous avez joué la combinaison : ..." encodée
+        pegs = self.space.pegs
+        self.answers = []  # Réponse codée -> texte affiché par feed_back
+        self.compact = []  # Réponse codée -> "2B1W"
+        for feedback in range((pegs + 1) * (pegs + 1)):
+            black, white = unpack_feedback(feedback, pegs)
+            text = "Réponse :\n"
+            if not (black or white):
+                text += "Aucun pion bien placé\n"
+            if black:
+                text += "Nombre de pions de la bonne couleur bien placés : %d\n" % black
+            if white:
+                text += "Nombre de pions de la bonne couleur mais mal placés :  %d\n" % white
+            self.answers.append(text + "\n")
+            self.compact.append("%dB%dW" % (black, white))
+        self._answer_bytes = [text.encode("utf-8") for text in self.answers]
+        self._compact_bytes = [(text + "\n").encode("ascii") for text in self.compact]
+
+    def name(self, code):
+        """
+        Renvoie les noms des couleurs de la combinaison d'entier code, séparés par ', '.
+        """
+        if self.names is None:
+            names = self.palette.names
+            if self.space.codes is None:  # Espace trop grand pour garder tous les noms : on les calcule à la demande
+                return ", ".join([names[symbol] for symbol in self.space.decode(code)])
+            self.names = [", ".join([names[symbol] for symbol in comb]) for comb in self.space.codes]
+        return self.names[code]
+
+    def text(self, code, feedback):
+        """
+        Renvoie le texte complet de la réponse (feedback, codée par pack_feedback) à l'essai d'entier code.
+        """
+        return "Vous avez joué la combinaison : " + self.name(code) + "\n" + self.answers[feedback]
+
+    def payload(self, code, feedback, compact=False):
+        """
+        Renvoie la réponse à l'essai d'entier code sous forme de bytes (UTF-8) prêts à être écrits en un appel :
+        le texte de text, ou "2B1W\\n" avec compact.
+        """
+        if compact:
+            return self._compact_bytes[feedback]
+        head = self._heads.get(code)
+        if head is None:
+            head = ("Vous avez joué la combinaison : " + self.name(code) + "\n").encode("utf-8")
+            if self.names is not None:  # On ne garde les lignes que si l'espace est assez petit
+                self._heads[code] = head
+        return head + self._answer_bytes[feedback]
+
+
+_renderers = {}  # Cache des Renderer, indexés par couleurs et variante
+
+
+def get_renderer(colors=None, config=None):
+    """
+    Renvoie le Renderer de la liste colors (par défaut, DEFAULT_COLORS) et de la variante config.
+    """
+    if colors is None:
+        colors = DEFAULT_COLORS
+    if config is None:
+        config = DEFAULT_CONFIG
+    key = (frozenset(colors), config.pegs, config.repeats)
+    renderer = _renderers.get(key)
+    if renderer is None:
+        renderer = _renderers[key] = Renderer(colors, config)
+    return renderer
+
+
+def generate_guess(colors, config=None, rng=None):
+    """
+    Génère une combinaison aléatoire de 4 couleurs prises dans le tuple colors, sans modifier colors.
     
     Arguments:
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu (nombre de pions, répétitions). Par défaut, DEFAULT_CONFIG.
+    - rng (random.Random) : générateur à utiliser, pour des tirages reproductibles. Par défaut, le module random.
     
     Valeurs de retour:
     str. Retourne un string de 4 lettres qui est la combinaison aléatoire.
@@ -19,14 +907,56 @@ def generate_guess(colors):
     >>> generate_guess([("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
     'bjov'
     """
-    from random import shuffle
+    if rng is None:
+        import random as rng
+    if config is None:
+        config = DEFAULT_CONFIG
+    if config.repeats:  # Chaque pion est tiré indépendamment
+        return ''.join(color[0] for color in rng.choices(colors, k=config.pegs))
+    return ''.join(color[0] for color in rng.sample(colors, config.pegs))  # pegs couleurs différentes
+
+
+class SecretGenerator:
+    """
+    Tire des solutions directement dans les entiers d'un CodeSpace, avec son propre random.Random.
+
+    Chaque processus de travail doit avoir son générateur : spawn(i) en dérive un, dont la graine est obtenue en
+    hachant (graine, i). Les tirages sont donc reproductibles quel que soit le découpage du travail, et les suites
+    de deux processus sont indépendantes.
+
+    Exemples:
+    >>> generator = SecretGenerator(get_space(), seed=42)
+    >>> generator.spawn(0).batch(3)
+    array('I', [879, 894, 390])
+    """
+
+    def __init__(self, space, seed=None):
+        import random
 
-    shuffle(colors)  # On mélange la base de donnée
-    guess = ''
-    for i in range(4):  # On compose le string
-        guess += colors[i][0]
+        self.space = space
+        self.seed = seed
+        self.rng = random.Random(seed)
 
-    return guess  # On retourne un string contenant les 4 premières couleurs de la base de données des couleurs mélangée
+    def spawn(self, stream):
+        """
+        Renvoie le générateur indépendant numéro stream (par exemple, un par processus ou par paquet de parties).
+        """
+        import hashlib
+
+        digest = hashlib.sha256(repr((self.seed, stream)).encode("utf-8")).digest()
+        return SecretGenerator(self.space, int.from_bytes(digest, 'little'))
+
+    def next(self):
+        """
+        Renvoie l'entier d'une solution tirée uniformément.
+        """
+        return self.rng.randrange(self.space.size)
+
+    def batch(self, count):
+        """
+        Renvoie les entiers de count solutions tirées uniformément, dans un array('I').
+        """
+        return array('I', self.rng.choices(range(self.space.size), k=count))
 
 
 def valid_colors(comb, colors):
@@ -48,14 +978,7 @@ def valid_colors(comb, colors):
     >>> valid_colors("8k2H", [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
     False
     """
-    comparaison = [lettre for lettre, nom in
-                   colors]  # On retravaille colors car sinon la comparaison avec in est infaisable (liste de tuple -> liste)
-
-    for i in range(len(comb)):  # Pour chaque élément de la combinaison :
-        if (not (comb[i] in comparaison)):  # Si l'élément n'est pas dans la liste de couleurs autorisées
-            return False  # La combinaison est fausse
-
-    return True  # Si on arrive ici, c'est forcément que rien n'est faux, donc c'est valide
+    return get_palette(colors).symbols.issuperset(comb)  # Tous les éléments sont des couleurs autorisées
 
 
 def check_unique(comb):
@@ -75,14 +998,10 @@ def check_unique(comb):
     >>> check_unique("bvov"))
     False
     """
-    for i in range(len(comb) - 1):  # Pour tout les éléments sauf le dernier
-        if (comb[i] in comb[i + 1:]):  # On regarde si il y a le même élément plus loin dans la chaine
-            return False  # Alors il y a répétition
+    return len(set(comb)) == len(comb)  # S'il y a répétition, l'ensemble des éléments est plus petit que la chaine
 
-    return True  # Si on arrive ici, c'est qu'aucune répétition n'a été trouvée, donc c'est bien vrai
 
-
-def count_well_placed(guess, comb):
+def count_well_placed(guess, comb, space=None):
     """
     Compte le nombre de pions bien placés.
     
@@ -91,6 +1010,7 @@ def count_well_placed(guess, comb):
         exemple : 'bjov'
     - comb (str) : string d'une combinaison de 4 lettres à comparer à guess.
         exemple : 'bjov'
+    - space (CodeSpace) : espace des combinaisons dont la table sert à répondre. Par défaut, celui de DEFAULT_COLORS.
     
     Valeurs de retour:
     int. Retourne le nombre de pions bien placés compris entre 0 et 4.
@@ -99,6 +1019,10 @@ def count_well_placed(guess, comb):
     >>> count_well_placed("borv", "bjov")
     2
     """
+    feedback = lookup_feedback(guess, comb, space)
+    if feedback is not None:  # Les deux combinaisons sont connues : on lit simplement la table
+        return feedback[0]
+
     count = 0
     for i in range(len(guess)):  # Pour chaque élément
         if (comb[i] == guess[i]):  # Si il est identique à l'élément de même position dans la solution
@@ -106,7 +1030,7 @@ def count_well_placed(guess, comb):
     return count
 
 
-def count_colors(guess, comb):
+def count_colors(guess, comb, space=None):
     """
     Compte le nombre de pions de bonne couleur mais mal placés.
 
@@ -115,22 +1039,25 @@ def count_colors(guess, comb):
         exemple : 'bjov'
     - comb (str) : string d'une combinaison de 4 lettres à comparer à guess.
         exemple : 'bjov'
+    - space (CodeSpace) : espace des combinaisons dont la table sert à répondre. Par défaut, celui de DEFAULT_COLORS.
     
     Valeurs de retour:
     int. Retourne le nombre de pions de bonne couleur et mal placés compris entre 0 et 4.
+    Une couleur répétée n'est comptée qu'autant de fois qu'elle apparaît dans les deux combinaisons.
     
     Exemples:
     >>> count_colors("borv","bjov")
     1
+    >>> count_colors("bbjj","jbbr")
+    2
     """
-    count = 0
-    for i in range(len(guess)):  # Pour chaque élément
-        if (comb[i] in guess):  # Si il est dans la solution
-            count += 1  # On augmente le compte de 1
-    return count - count_well_placed(guess, comb)  # On renvoie le compte en retirant le nombre d'éléments bien placés
+    feedback = lookup_feedback(guess, comb, space)
+    if feedback is not None:
+        return feedback[1]
+    return score_pair(guess, comb)[1]  # On compare les histogrammes de couleurs des deux combinaisons
 
 
-def check_win(guess, comb):
+def check_win(guess, comb, space=None):
     """
     Vérifie si les 2 combinaisons sont identiques.
     
@@ -139,6 +1066,7 @@ def check_win(guess, comb):
         exemple : 'bjov'
     - comb (str) : string d'une combinaison de 4 lettres à comparer à guess.
         exemple : 'bjov'
+    - space (CodeSpace) : espace des combinaisons dont la table sert à répondre. Par défaut, celui de DEFAULT_COLORS.
     
     Valeurs de retour:
     bool. Retourne True si comb est identique à guess sinon False.
@@ -149,7 +1077,8 @@ def check_win(guess, comb):
     >>> check_win("borv", "bjov")
     False
     """
-    return count_well_placed(guess, comb) == 4  # On teste si les 4 éléments sont bien placés
+    pegs = PEGS if space is None else space.pegs
+    return count_well_placed(guess, comb, space) == pegs  # On teste si tous les éléments sont bien placés
 
 
 def to_colors_name(comb, colors):
@@ -169,21 +1098,18 @@ def to_colors_name(comb, colors):
     >>> to_colors_name("bjov", [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
     "bleu, jaune, orange, vert"
     """
-    res = ''
-    for i in range(len(comb)):  # Pour chaque élément
-        for j in range(len(colors)):  # Pour chaque tuple de colors :
-            if comb[i] == colors[j][0]:  # Si le premier élément est le même que celui de la combinaison
-                res += colors[j][1] + ", "  # On ajoute le nom de cet élément à la string de résultat + le séparateur
-    return res[:len(res) - 2]  # On renvoit le résultat sans le dernier séparateur inutile
+    names = get_palette(colors).names  # symbole -> nom, construit une seule fois par liste de couleurs
+    return ", ".join([names[symbol] for symbol in comb if symbol in names])  # Les symboles inconnus sont ignorés
 
 
-def is_4_long(comb):
+def is_4_long(comb, config=None):
     """
-    Vérifie si la combinaison a bien une longueur de 4.
+    Vérifie si la combinaison a bien une longueur de 4 (ou du nombre de pions de config).
     
     Arguments:
     - comb (str) : string d'une combinaison de 4 lettres.
         exemple : 'bjov'
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
     
     Valeurs de retour:
     bool. Retourne True si la combinaison comporte 4 éléments, False sinon.
@@ -195,8 +1121,9 @@ def is_4_long(comb):
     Veuillez entrer une combinaison de longueur 4 !
     False
     """
-    if len(comb) < 4 or len(comb) > 4:  # Si la combinaison ne vaut pas 4 éléments
-        print("Veuillez entrer une combinaison de longueur 4 !")  # On l'annonce et on retourne False
+    pegs = PEGS if config is None else config.pegs
+    if len(comb) < pegs or len(comb) > pegs:  # Si la combinaison ne vaut pas pegs éléments
+        print("Veuillez entrer une combinaison de longueur", str(pegs), "!")  # On l'annonce et on retourne False
         return False
     return True
 
@@ -230,7 +1157,29 @@ def is_valid_letters(comb, colors):
     return no_error
 
 
-def is_valid_comb(comb, colors):
+def comb_errors(comb, colors, config=None):
+    """
+    Liste les erreurs de la combinaison, sans rien afficher.
+    
+    Arguments:
+    - comb (str) : string d'une combinaison de 4 lettres.
+        exemple : 'bjov'
+    - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
+        exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu (longueur, répétitions permises). Par défaut, DEFAULT_CONFIG.
+    
+    Valeurs de retour:
+    list. Les messages d'erreur, dans l'ordre où is_valid_comb les affiche (vide si la combinaison est valide).
+    
+    Exemples:
+    >>> comb_errors("bjo2", [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
+    ['Veuillez entrer une combinaison de couleurs existantes !', "Veuillez n'utiliser que des lettres !"]
+    """
+    palette = get_palette(colors)
+    return palette.messages(palette.check(comb, config), config)
+
+
+def is_valid_comb(comb, colors, config=None):
     """
     Vérifie si la combinaison est valide.
     
@@ -239,6 +1188,7 @@ def is_valid_comb(comb, colors):
         exemple : 'bjov'
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu (longueur, répétitions permises). Par défaut, DEFAULT_CONFIG.
     
     Valeurs de retour:
     bool. True si elle est valide, False sinon.
@@ -249,24 +1199,21 @@ def is_valid_comb(comb, colors):
     >>> is_valid_comb("b6ov", [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")])
     False
     """
-    no_error = True
-    if not (is_4_long(comb)):  # On teste si la combinaison vaut 4 de long
-        no_error = False
-    if not (is_valid_letters(comb, colors)):  # On teste si les lettres rentrées sont valides
-        no_error = False
-    if not (check_unique(comb)):  # Si ce ne sont pas des couleurs différentes
-        print("Veuillez entrer une combinaison de couleurs différentes !")  # On l'annonce et on met False
-        no_error = False
-    return no_error
+    errors = comb_errors(comb, colors, config)
+    for message in errors:  # On annonce chaque erreur
+        print(message)
+    return not errors
 
 
-def comb_input(colors):
+def comb_input(colors, config=None, hints=None):
     """
     Renvoie la combinaison entrée par l'utilisateur quand elle est valide.
     
     Arguments:
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+    - hints (HintService) : indices de la partie (voir hints.py) ; le joueur tape ? pour afficher le dernier.
     
     Valeurs de retour:
     string. Retourne le nom des 4 couleurs de la combinaison.
@@ -283,11 +1230,26 @@ def comb_input(colors):
     while not (valid):  # Tant que la combinaison est fausse
         comb = input("Devinez la combinaison : ")  # Entrer une combinaison
         comb = comb.lower()  # On convertit le tout en minuscules
-        valid = is_valid_comb(comb, colors)  # On teste la validité
+        if hints is not None and comb == "?":  # Demande d'indice : on l'attend s'il n'est pas encore prêt
+            sys.stdout.write(hints.text())
+            continue
+        valid = is_valid_comb(comb, colors, config)  # On teste la validité
     return comb
 
 
-def feed_back(guess, comb, colors):
+def write_answer(renderer, code, feedback):
+    """
+    Affiche la réponse codée feedback à l'essai d'entier code : le texte déjà préparé est écrit en un seul appel.
+
+    Arguments:
+    - renderer (Renderer) : textes des combinaisons et des réponses (voir get_renderer).
+    - code (int) : entier de l'essai.
+    - feedback (int) : réponse codée (voir pack_feedback).
+    """
+    sys.stdout.write(renderer.text(code, feedback))
+
+
+def feed_back(guess, comb, colors, config=None):
     """
     Répond en fonction de la combinaison donnée.
     
@@ -298,6 +1260,7 @@ def feed_back(guess, comb, colors):
         exemple : 'bjov'
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
     
     Valeurs de retour:
     void. Aucune.
@@ -309,19 +1272,20 @@ def feed_back(guess, comb, colors):
     Nombre de pions de la bonne couleur bien placés : 1
     Nombre de pions de la bonne couleur mais mal placés :  2
     """
-    print("Vous avez joué la combinaison :", to_colors_name(comb, colors))
-    print("Réponse :")
-    if not (count_well_placed(guess, comb) or count_colors(guess, comb)):  # On annonce si rien n'est bon
-        print("Aucun pion bien placé")
-    else:  # Ou ce qui est bon
-        if count_well_placed(guess, comb):
-            print("Nombre de pions de la bonne couleur bien placés :", count_well_placed(guess, comb))
-        if count_colors(guess, comb):
-            print("Nombre de pions de la bonne couleur mais mal placés : ", count_colors(guess, comb))
-    print("")  # Donne de l'air dans la "mise en page"
+    renderer = get_renderer(colors, config)
+    space = renderer.space
+    well_placed = count_well_placed(guess, comb, space)  # Une seule lecture de la table par valeur
+    colors_only = count_colors(guess, comb, space)
+    feedback = pack_feedback(well_placed, colors_only, space.pegs)
+    code = space.find(comb)
+    if code is None:  # Combinaison hors de l'espace (par exemple répétée dans une variante sans répétitions)
+        sys.stdout.write("Vous avez joué la combinaison : " + to_colors_name(comb, colors) + "\n"
+                         + renderer.answers[feedback])
+    else:
+        write_answer(renderer, code, feedback)
 
 
-def game(guess, colors):
+def game(guess, colors, player=None, config=None, recorder=None, hints=None):
     """
     Fait se dérouler le corps d'une partie de mastermind.
     
@@ -330,6 +1294,10 @@ def game(guess, colors):
         exemple : 'bjov'
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - player (Solver) : joueur automatique (voir solver.py) qui remplace comb_input. Par défaut, le joueur humain.
+    - config (GameConfig) : variante du jeu (nombre de pions, d'essais...). Par défaut, DEFAULT_CONFIG.
+    - recorder (GameRecorder) : journal où garder chaque essai (voir game_log.py), ou None.
+    - hints (HintService) : indices affichés au joueur humain à chaque tour (voir hints.py), ou None.
     
     Valeurs de retour:
     bool. True si on a gagné, False si on a perdu.
@@ -367,25 +1335,42 @@ def game(guess, colors):
     Nombre de pions de la bonne couleur bien placés : 4
     True
     """
-    essais_restant = 10  # On donne 10 essais
-    while essais_restant > 0:  # On redonne une chance tant qu'il reste des essais
-        print("Il vous reste", essais_restant, "essai(s)")
-        comb = comb_input(colors)  # Renvoie une combinaison valide
-        feed_back(guess, comb, colors)
-
-        if check_win(guess, comb):  # On vérifie si le joueur a gagné
-            return True  # Alors on revoie True
-        essais_restant -= 1
-    return False  # Si on arrive ici, c'est que les chances sont épuisées sans avoir gagné donc False
+    session = Game(colors, config, secret=guess, recorder=recorder)  # La partie elle-même, sans affichage
+    session.start()
+    renderer = get_renderer(colors, config)
+    space = renderer.space
+    if hints is not None:
+        hints.reset()
+    while session.state == "playing":  # On redonne une chance tant qu'il reste des essais
+        print("Il vous reste", session.tries_left, "essai(s)")
+        if hints is not None and player is None:  # L'indice est calculé dans un thread : on ne l'attend qu'un instant
+            text = hints.text(HINT_WAIT)
+            sys.stdout.write("Indice en cours de calcul, tapez ? pour l'afficher\n" if text is None else text)
+        if player is None:
+            comb = comb_input(colors, config, hints)  # Renvoie une combinaison valide
+        else:  # Le joueur automatique propose toujours une combinaison valide
+            comb = player.next_guess()
+            print("Devinez la combinaison :", comb)
+        result = session.submit_guess(comb)  # Combinaison validée et notée une seule fois, par la partie
+        write_answer(renderer, space.encode(comb), pack_feedback(result["black"], result["white"], space.pegs))
+        if player is not None:  # On transmet la réponse au joueur automatique
+            player.observe(comb, result["black"], result["white"])
+        if hints is not None and session.state == "playing":  # L'indice suivant se calcule pendant l'affichage
+            hints.observe(comb, result["black"], result["white"])
+    return session.state == "won"  # Sinon les chances sont épuisées sans avoir gagné donc False
 
 
-def full_game(colors):
+def full_game(colors, player=None, config=None, recorder=None, hints=None):
     """
     Fait se dérouler une partie entière de mastermind.
     
     Arguments:
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - player (Solver) : joueur automatique qui remplace le joueur humain (voir game).
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+    - recorder (GameRecorder) : journal où garder chaque essai (voir game_log.py), ou None.
+    - hints (HintService) : indices affichés à chaque tour (voir game), ou None.
     
     Valeurs de retour:
     void. Aucune.
@@ -424,21 +1409,252 @@ def full_game(colors):
     
     BRAVO !
     """
-    guess = generate_guess(colors)  # On génère la solution
-    if game(guess, colors):  # Si on a pas gagné, Bravo
+    guess = generate_guess(colors, config)  # On génère la solution
+    if game(guess, colors, player, config, recorder, hints):  # Si on a pas gagné, Bravo
         print("BRAVO !")
     else:  # Sinon on donne la solution
         print("Vous avez écoulé vos essais... Dommage !")
         print("La bonne combinaison était :", to_colors_name(guess, colors), "(" + guess.upper() + ")")
 
 
-def show_rules(colors):
+class GameState:
+    """
+    État d'une partie, aussi petit que possible pour garder en mémoire de très nombreuses parties : l'entier de la
+    solution, le nombre d'essais restants, les entiers des essais joués (array('H'), ou 'I' et 'Q' pour les grands
+    espaces, voir typecode) et leurs réponses codées (bytes, une par essai).
+
+    L'ensemble des candidats n'est pas gardé (il coûterait un octet par combinaison de l'espace) : candidates le
+    reconstruit à partir de l'historique quand il sert. to_bytes et from_bytes permettent de suspendre une partie
+    et de la reprendre plus tard, ailleurs.
+
+    Exemples:
+    >>> space = get_space()
+    >>> state = GameState(space.encode("bjov"))
+    >>> state.play(space, space.encode("borv"))
+    11
+    >>> GameState.from_bytes(state.to_bytes()) == state
+    True
+    """
+
+    __slots__ = ("secret", "tries_left", "guesses", "feedbacks")
+
+    def __init__(self, secret, tries_left=TRIES, guesses=None, feedbacks=b'', typecode='H'):
+        self.secret = secret
+        self.tries_left = tries_left
+        self.guesses = array(typecode) if guesses is None else guesses
+        self.feedbacks = feedbacks
+
+    @staticmethod
+    def typecode(size):
+        """
+        Renvoie le type d'array le plus petit qui contient les entiers d'un espace de size combinaisons.
+        """
+        if size <= 1 << 16:
+            return 'H'
+        return 'I' if size <= 1 << 32 else 'Q'
+
+    @property
+    def attempts(self):
+        return len(self.feedbacks)
+
+    def __eq__(self, other):
+        return (isinstance(other, GameState) and self.secret == other.secret and self.tries_left == other.tries_left
+                and self.guesses == other.guesses and self.feedbacks == other.feedbacks)
+
+    def __repr__(self):
+        return "GameState(%d, %d, %r, %r)" % (self.secret, self.tries_left, self.guesses, self.feedbacks)
+
+    def state(self, pegs=PEGS):
+        """
+        Renvoie "won", "lost" ou "playing".
+        """
+        if self.feedbacks and self.feedbacks[-1] == pack_feedback(pegs, 0, pegs):
+            return "won"
+        return "lost" if self.tries_left == 0 else "playing"
+
+    def record(self, guess, feedback):
+        """
+        Ajoute l'essai guess (entier) et sa réponse codée à l'historique, et consomme un essai.
+        """
+        self.guesses.append(guess)
+        self.feedbacks += bytes((feedback,))
+        self.tries_left -= 1
+
+    def play(self, space, guess):
+        """
+        Joue l'essai guess (entier de space) et renvoie sa réponse codée.
+        """
+        feedback = space.feedback(guess, self.secret)
+        self.record(guess, feedback)
+        return feedback
+
+    def candidates(self, space):
+        """
+        Renvoie le CandidateSet des solutions compatibles avec toutes les réponses reçues.
+        """
+        candidates = CandidateSet(space)
+        for guess, feedback in zip(self.guesses, self.feedbacks):
+            candidates.filter(guess, feedback)
+        return candidates
+
+    def to_bytes(self):
+        """
+        Renvoie l'état sous forme de bytes : type des essais (1 octet), essais restants et nombre d'essais joués
+        (4 octets chacun), solution (de la taille d'un essai), puis les essais et les réponses. Les entiers sont
+        écrits en petit-boutiste.
+        """
+        guesses = self.guesses
+        if sys.byteorder == "big":
+            guesses = array(guesses.typecode, guesses)
+            guesses.byteswap()
+        return (guesses.typecode.encode("ascii") + self.tries_left.to_bytes(4, 'little')
+                + len(guesses).to_bytes(4, 'little') + self.secret.to_bytes(guesses.itemsize, 'little')
+                + guesses.tobytes() + self.feedbacks)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Renvoie l'état écrit par to_bytes dans data.
+        """
+        guesses = array(chr(data[0]))
+        tries_left = int.from_bytes(data[1:5], 'little')
+        count = int.from_bytes(data[5:9], 'little')
+        start = 9 + guesses.itemsize
+        secret = int.from_bytes(data[9:start], 'little')
+        end = start + count * guesses.itemsize
+        guesses.frombytes(data[start:end])
+        if sys.byteorder == "big":
+            guesses.byteswap()
+        return cls(secret, tries_left, guesses, bytes(data[end:end + count]))
+
+
+class Game:
+    """
+    Une partie de Mastermind sous forme de machine à états, sans input() ni print() : c'est l'appelant (le jeu en
+    console, le serveur de server.py...) qui lit les combinaisons et affiche les réponses.
+
+    États : "idle" (pas de partie), "playing", "won" et "lost". L'état de la partie en cours est un GameState
+    (self.current), que suspend et resume permettent de mettre de côté puis de reprendre.
+
+    Exemples:
+    >>> game = Game(secret="bjov")
+    >>> game.start()["state"]
+    'playing'
+    >>> game.submit_guess("borv")
+    {'valid': True, 'black': 2, 'white': 1, 'state': 'playing', 'tries_left': 9}
+    """
+
+    def __init__(self, colors=None, config=None, rng=None, secret=None, recorder=None, session=0):
+        if colors is None:
+            colors = DEFAULT_COLORS
+        if config is None:
+            config = DEFAULT_CONFIG
+        self.colors = colors
+        self.config = config
+        self.space = get_space(colors, config)
+        self.palette = get_palette(colors)
+        self.rng = rng  # random.Random qui tire les solutions (par défaut, le module random)
+        self.fixed_secret = secret
+        self.recorder = recorder  # GameRecorder (voir game_log.py) qui garde chaque essai, ou None
+        self.session = session  # Identifiant de la partie dans le journal
+        self.current = None  # GameState de la partie en cours, None tant qu'aucune n'a commencé
+
+    @property
+    def secret(self):
+        return None if self.current is None else self.space.decode(self.current.secret)
+
+    @property
+    def state(self):
+        return "idle" if self.current is None else self.current.state(self.config.pegs)
+
+    @property
+    def tries_left(self):
+        return 0 if self.current is None else self.current.tries_left
+
+    @property
+    def attempts(self):
+        return 0 if self.current is None else self.current.attempts
+
+    def start(self, secret=None):
+        """
+        Commence une nouvelle partie, avec la solution secret ou une solution tirée au hasard.
+
+        Valeurs de retour:
+        dict. Le statut de la partie (voir status).
+        """
+        if secret is None:
+            secret = self.fixed_secret
+        if secret is None:  # On tire un entier de l'espace : la liste colors n'est pas mélangée
+            rng = self.rng
+            if rng is None:
+                import random as rng
+            secret = self.space.decode(rng.randrange(self.space.size))
+        self.current = GameState(self.space.encode(secret), self.config.tries,
+                                 typecode=GameState.typecode(self.space.size))
+        if self.recorder is not None:
+            self.session = self.recorder.new_session()
+        return self.status()
+
+    def submit_guess(self, comb):
+        """
+        Joue la combinaison comb.
+
+        Valeurs de retour:
+        dict. {"valid": False, "error": codes ERROR_*, "errors": [messages]} si comb n'est pas valide (aucun essai
+        n'est alors consommé), sinon {"valid": True, "black", "white", "state", "tries_left"}.
+        """
+        if self.state != "playing":
+            return {"valid": False, "error": 0, "errors": ["Aucune partie en cours !"]}
+        comb = comb.lower()
+        errors = self.palette.check(comb, self.config)
+        if errors:
+            return {"valid": False, "error": errors, "errors": self.palette.messages(errors, self.config)}
+
+        secret = self.secret
+        black = count_well_placed(secret, comb, self.space)
+        white = count_colors(secret, comb, self.space)
+        guess = self.space.encode(comb)
+        self.current.record(guess, pack_feedback(black, white, self.config.pegs))
+        state = self.state
+        if self.recorder is not None:
+            self.recorder.record(self.session, self.current.secret, guess, black, white, state != "playing")
+        return {"valid": True, "black": black, "white": white, "state": state, "tries_left": self.tries_left}
+
+    def status(self):
+        """
+        Valeurs de retour:
+        dict. {"state", "tries_left", "attempts"}, plus "secret" une fois la partie perdue.
+        """
+        status = {"state": self.state, "tries_left": self.tries_left, "attempts": self.attempts}
+        if self.state == "lost":
+            status["secret"] = self.secret
+        return status
+
+    def suspend(self):
+        """
+        Renvoie l'état de la partie en cours (bytes, voir GameState.to_bytes), à reprendre avec resume.
+        """
+        return self.current.to_bytes()
+
+    def resume(self, data):
+        """
+        Reprend la partie suspendue dans data (voir suspend).
+
+        Valeurs de retour:
+        dict. Le statut de la partie (voir status).
+        """
+        self.current = GameState.from_bytes(data)
+        return self.status()
+
+
+def show_rules(colors, config=None):
     """
     Affiche les règles du Mastermind.
     
     Arguments:
     - colors (list) : liste de tuples contenant chacun le symbole puis le nom de la couleur.
         exemple : [("b", "bleu"), ("v", "vert"), ("j", "jaune"), ("r", "rouge"), ("o", "orange")]
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
     
     Valeurs de retour:
     void. Aucune.
@@ -471,38 +1687,44 @@ def show_rules(colors):
     o = orange
 
     """
-    print("""    ****************JEU DU MASTERMIND*****************
+    if config is None:
+        config = DEFAULT_CONFIG
+    text = """    ****************JEU DU MASTERMIND*****************
     *                                                *
     *                 Règles du jeu :                *
     *                 ---------------                *
     *  Le but du jeu est de trouver une combinaison  *
     *  que l'ordinateur aura choisie aléatoirement.  *
-    * Vous disposez de 10 essais pour parvenir à la  *
-    *    combinaison. Celle-ci est composée de 4     *
+    * Vous disposez de %2d essais pour parvenir à la  *
+    *    combinaison. Celle-ci est composée de %d     *
     *   lettres représentant chacune une couleur.    *
     *   A chaque essais, l'ordinateur vous dit le    *
     *  nombre de couleurs correctes et bien placées  *
     * ainsi que le nombre de couleurs correctes mais *
     *                  mal placées.                  *
     *                                                *
-    **************************************************
+    **************************************************\n\n""" % (config.tries, config.pegs)
+    if config.repeats:
+        text += "    Une couleur peut apparaître plusieurs fois dans la combinaison.\n\n"
+    text += """    Le code des couleurs est :
+    --------------------------\n\n"""
+    text += "".join(["    " + symbol + " = " + name + "\n" for symbol, name in colors])
+    sys.stdout.write(text + "\n")  # Les règles sont écrites en un seul appel
 
-    Le code des couleurs est :
-    --------------------------
-    """)
-    for i in range(len(colors)):
-        print("   ", colors[i][0], "=", colors[i][1])
-    print("")
 
-
-def mastermind():
+def mastermind(config=None, log_path=None, hints=False):
     """
     Fonction principale du jeu du Mastermind.
     Exécute une partie de Mastermind.
     (Fonction impure)
     
     Arguments:
-    Aucun.
+    - config (GameConfig) : variante du jeu, dont les couleurs sont prises dans PALETTE. Par défaut, le jeu
+        classique à 8 couleurs.
+    - log_path (str) : journal où garder les parties jouées (voir game_log.py), par exemple pour les comparer aux
+        stratégies du solveur avec tournament.py. Par défaut, aucun.
+    - hints (bool) : True pour afficher à chaque tour le nombre de combinaisons encore possibles et un essai
+        conseillé (voir hints.py).
     
     Valeurs de retour:
     void. Aucune.
@@ -595,18 +1817,42 @@ def mastermind():
     ...
     """
     continuer = True  # On crée une variable pour détecter si on rejoue
-    colors = [("r", "rouge"), ("j", "jaune"), ("v", "vert"), ("b", "bleu"), ("o", "orange"), ("c", "blanc"),
-              ("t", "violet"), ("f", "fuchsia")]  # On crée la base de donnée colors
-    show_rules(colors)  # On affiche les règles du jeu
+    if config is None:
+        colors = list(DEFAULT_COLORS)  # On crée la base de donnée colors
+    else:
+        colors = config.palette()
+    show_rules(colors, config)  # On affiche les règles du jeu
+    recorder = None
+    if log_path is not None:  # Chaque essai est écrit aussitôt : rien ne se perd si le joueur quitte
+        from game_log import GameRecorder
+
+        recorder = GameRecorder(log_path, get_space(colors, config), buffer_records=1)
+    service = None
+    if hints:
+        from hints import HintService
 
-    while (continuer):  # On démarre une boucle sur des parties
-        full_game(colors)  # On lance une partie
+        service = HintService(colors, config)
 
-        rejoue = input("Voulez-vous rejouer ? (o/n) : ")  # On demande au joueur si il veut rejouer
-        if rejoue.lower() != "o":  # Si il ne répond pas oui
-            continuer = False  # On casse la boucle des parties
-            print("Au revoir !")
+    try:
+        while (continuer):  # On démarre une boucle sur des parties
+            full_game(colors, None, config, recorder, service)  # On lance une partie
+
+            rejoue = input("Voulez-vous rejouer ? (o/n) : ")  # On demande au joueur si il veut rejouer
+            if rejoue.lower() != "o":  # Si il ne répond pas oui
+                continuer = False  # On casse la boucle des parties
+                print("Au revoir !")
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if service is not None:
+            service.close()
 
 
 if __name__ == "__main__":  # Si le fichier n'est pas un module, qu'il est appelé seul (en main)
-    mastermind()  # Lancer le jeu
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Jeu du Mastermind")
+    parser.add_argument("log", nargs="?", help="journal où garder les parties jouées (voir game_log.py)")
+    parser.add_argument("--indices", action="store_true", help="afficher un indice à chaque tour")
+    args = parser.parse_args()
+    mastermind(log_path=args.log, hints=args.indices)  # Lancer le jeu
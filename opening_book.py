@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Livre d'ouvertures du solveur : l'arbre des coups de chaque stratégie, calculé une fois et gardé sur disque
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+from mastermind import get_space, pack_feedback, DEFAULT_COLORS, DEFAULT_CONFIG
+from solver import Solver
+
+MAGIC = b'MMOB'
+VERSION = 2
+HEADER = struct.Struct('<4sHBBc32s')  # magic, version, profondeur, pions, boutisme, empreinte
+NO_MOVE = 0xFFFFFFFF  # Fils d'une réponse impossible, ou qui ne laisse que 2 candidats au plus
+BOOK_DEPTH = 3  # Nombre de coups gardés dans le livre des espaces sans table des réponses
+FULL_DEPTH = 255  # Profondeur d'un livre complet : tous les coups qui demandent un calcul
+
+
+def cache_dir():
+    """
+    Renvoie le dossier des fichiers de cache (variable d'environnement MASTERMIND_CACHE, sinon ~/.cache/mastermind).
+    """
+    path = os.environ.get("MASTERMIND_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "mastermind")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def fingerprint(colors, config, strategy):
+    """
+    Renvoie l'empreinte (32 octets) de tout ce dont dépendent les décisions du livre : les couleurs (peu importe
+    leur ordre), le nombre de pions, les répétitions, la stratégie et la version du format.
+    """
+    if colors is None:
+        colors = DEFAULT_COLORS
+    if config is None:
+        config = DEFAULT_CONFIG
+    identity = repr((sorted(colors), config.pegs, config.repeats, strategy, VERSION))
+    return hashlib.sha256(identity.encode("utf-8")).digest()
+
+
+def default_path(colors=None, config=None, strategy="minimax"):
+    """
+    Renvoie le chemin du livre dans le dossier de cache ; il change avec l'empreinte.
+    """
+    return os.path.join(cache_dir(), "book-" + fingerprint(colors, config, strategy).hex()[:16] + ".bin")
+
+
+class OpeningBook:
+    """
+    Arbre des décisions d'une stratégie pour ses depth premiers coups.
+
+    Comme la stratégie est déterministe, un noeud est identifié par la suite des réponses reçues. Seuls les noeuds
+    où il reste plus de 2 candidats sont gardés (le solveur joue alors un candidat sans calcul). Ils sont rangés
+    dans un tableau d'entiers sur 32 bits, C + 1 entiers par noeud avec C le nombre de réponses codées possibles :
+    l'essai du noeud, puis pour chaque réponse le numéro du noeud fils (NO_MOVE s'il n'y en a pas). La racine est
+    le noeud 0.
+    """
+
+    def __init__(self, moves, depth, classes, fingerprint):
+        self.moves = moves  # array('I') ou memoryview sur le fichier
+        self.depth = depth
+        self.classes = classes
+        self.fingerprint = fingerprint
+
+    def lookup(self, history):
+        """
+        Renvoie l'essai du livre après l'historique history (liste de (essai, réponse codée)), ou None si la partie
+        est sortie du livre (trop profonde ou essais différents de ceux de la stratégie).
+        """
+        if len(history) >= self.depth or not len(self.moves):
+            return None
+        stride = self.classes + 1
+        node = 0
+        for guess, feedback in history:
+            if self.moves[node * stride] != guess:  # Un autre essai a été joué : le livre ne s'applique pas
+                return None
+            node = self.moves[node * stride + 1 + feedback]
+            if node == NO_MOVE:
+                return None
+        return self.moves[node * stride]
+
+    @classmethod
+    def build(cls, colors=None, config=None, strategy="minimax", depth=BOOK_DEPTH):
+        """
+        Calcule le livre en jouant la stratégie sur toutes les suites de réponses possibles (les noeuds sont
+        numérotés dans l'ordre du parcours en profondeur).
+        """
+        solver = Solver(colors, strategy, config)
+        space = solver.space
+        classes = (space.pegs + 1) ** 2
+        win = pack_feedback(space.pegs, 0, space.pegs)
+        empty = array('I', [NO_MOVE]) * classes
+        moves = array('I')
+
+        def visit(candidates, history):
+            node = len(moves) // (classes + 1)
+            solver.restore(candidates, history)
+            guess = solver.choose()
+            moves.append(guess)
+            moves.extend(empty)
+            if len(history) + 1 == depth:
+                return node
+            row = space.row(guess)
+            for feedback in sorted(set(row[c] for c in candidates)):
+                if feedback == win:
+                    continue
+                child = candidates.copy()
+                child.filter(guess, feedback)
+                if len(child) > 2:
+                    moves[node * (classes + 1) + 1 + feedback] = visit(child, history + [(guess, feedback)])
+            return node
+
+        if len(solver.candidates) > 2:
+            visit(solver.candidates, [])
+        return cls(moves, depth, classes, fingerprint(colors, config, strategy))
+
+    def save(self, path):
+        """
+        Écrit le livre dans path, en petit-boutiste quelle que soit la machine. L'écriture passe par un fichier
+        temporaire de nom unique renommé à la fin : un fichier n'est jamais à moitié écrit, et plusieurs processus
+        peuvent calculer le même livre en même temps.
+        """
+        pegs = int(self.classes ** 0.5) - 1
+        header = HEADER.pack(MAGIC, VERSION, self.depth, pegs, b'<', self.fingerprint)
+        moves = array('I', self.moves)
+        if sys.byteorder != "little":
+            moves.byteswap()
+        descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path))
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(header)
+                moves.tofile(f)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @classmethod
+    def load(cls, path, colors=None, config=None, strategy="minimax"):
+        """
+        Projette en mémoire (mmap) le livre de path, sans le lire entièrement. Sur une machine gros-boutiste, les
+        coups sont lus et remis dans l'ordre de la machine.
+
+        Valeurs de retour:
+        OpeningBook ou None si le fichier n'existe pas ou ne correspond plus aux couleurs, à la configuration ou
+        à la stratégie.
+        """
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return None
+        with f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Fichier vide
+                return None
+        if len(data) < HEADER.size:
+            return None
+        magic, version, depth, pegs, order, print_ = HEADER.unpack_from(data)
+        classes = (pegs + 1) ** 2
+        if (magic != MAGIC or version != VERSION or print_ != fingerprint(colors, config, strategy)
+                or (len(data) - HEADER.size) % (4 * (classes + 1)) or order != b'<'):
+            data.close()
+            return None
+        if sys.byteorder == "little":
+            moves = memoryview(data)[HEADER.size:].cast('I')
+        else:
+            moves = array('I', data[HEADER.size:])
+            moves.byteswap()
+            data.close()
+        return cls(moves, depth, classes, print_)
+
+
+def open_book(colors=None, config=None, strategy="minimax", path=None, depth=None):
+    """
+    Renvoie le livre de la stratégie : celui du disque s'il est à jour, sinon un livre recalculé et sauvegardé.
+
+    Par défaut (depth None), le livre est complet (FULL_DEPTH) pour les espaces qui ont une table des réponses :
+    le solveur n'a alors plus aucun coup à calculer. Pour les plus grands espaces, il garde BOOK_DEPTH coups.
+
+    Exemples:
+    >>> import tempfile
+    >>> from unittest import mock
+    >>> with tempfile.TemporaryDirectory() as directory, mock.patch.dict(os.environ, MASTERMIND_CACHE=directory):
+    ...     solver = Solver(strategy="minimax", book=open_book())
+    ...     os.listdir(directory) == [os.path.basename(default_path())]
+    True
+    >>> solver.next_guess()
+    'bcfj'
+    """
+    if depth is None:
+        depth = FULL_DEPTH if get_space(colors, config).has_table() else BOOK_DEPTH
+    if path is None:
+        path = default_path(colors, config, strategy)
+    book = OpeningBook.load(path, colors, config, strategy)
+    if book is None or book.depth < depth:
+        book = OpeningBook.build(colors, config, strategy, depth)
+        book.save(path)
+    return book
+
+
+if __name__ == "__main__":
+    import time
+
+    for name in sys.argv[1:] or ["minimax"]:
+        start = time.time()
+        open_book(strategy=name)
+        print(name, ":", default_path(strategy=name), "(%.1f s)" % (time.time() - start))
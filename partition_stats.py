@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Statistiques des partitions de l'espace par chaque premier essai et chaque second essai, calculées une fois et
+# gardées dans un fichier indexé
+
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from itertools import compress
+
+from mastermind import feedback_mask, get_space
+from snapshot import attach_space, open_space, share_table
+
+MAGIC = b'MMPS'
+VERSION = 1
+# magic, version, pions, répétitions, symboles de l'espace, taille, réponses codées, formes, type des tailles
+HEADER = struct.Struct('<4sHBB24sIHHc')
+CHUNK_GUESSES = 256  # Nombre de seconds essais calculés par tâche : l'unité de travail et de reprise
+STATS_FILES = "stats-%s-%d%s.bin"  # Nom du fichier d'un espace : symboles, pions, "r" avec répétitions
+
+
+def shapes(space):
+    """
+    Renvoie les premiers essais canoniques de space (entiers) : ceux dont les couleurs, lues de gauche à droite,
+    apparaissent dans l'ordre des symboles (0, puis 1...). Renommer les couleurs ne change pas les partitions :
+    tout premier essai a donc les statistiques de sa forme canonique (voir canonical).
+
+    Exemples:
+    >>> [get_space().decode(code) for code in shapes(get_space())]
+    ['bcfj']
+    """
+    n = len(space.symbols)
+    found = []
+
+    def extend(digits, used):
+        if len(digits) == space.pegs:
+            found.append(space.encode(''.join(space.symbols[d] for d in digits)))
+            return
+        for d in range(min(used + 1, n)):
+            if space.repeats or d == used:  # Sans répétitions, chaque pion a une nouvelle couleur
+                extend(digits + [d], max(used, d + 1))
+
+    extend([], 0)
+    return found
+
+
+def canonical(space, first):
+    """
+    Renvoie la table de traduction (str.translate) qui renomme les couleurs du premier essai first (str) pour en
+    faire une forme canonique : ses couleurs deviennent les premiers symboles, dans l'ordre d'apparition, et les
+    autres couleurs les symboles suivants, dans l'ordre.
+    """
+    order = list(dict.fromkeys(first)) + [symbol for symbol in space.symbols if symbol not in first]
+    return str.maketrans(''.join(order), space.symbols)
+
+
+def _record(space):
+    # pire cas, nombre de classes non vides, entropie (bits), taille de chaque classe
+    classes = (space.pegs + 1) * (space.pegs + 1)
+    return struct.Struct('<IHxxf%d%s' % (classes, 'H' if space.size < 1 << 16 else 'I'))
+
+
+def _pack(record, sizes):
+    total = sum(sizes)
+    entropy = math.log2(total) - sum(s * math.log2(s) for s in sizes if s) / total if total else 0.0
+    return record.pack(max(sizes), sum(1 for s in sizes if s), entropy, *sizes)
+
+
+def _sizes(feedbacks, classes):
+    counts = Counter(feedbacks)
+    return [counts.get(f, 0) for f in range(classes)]
+
+
+def _layout(space):
+    """
+    Renvoie (formes, réponses codées, paquets par forme, position du drapeau de chaque paquet, position des
+    statistiques des premiers essais, position des statistiques des seconds essais, taille du fichier).
+    """
+    firsts = shapes(space)
+    classes = (space.pegs + 1) * (space.pegs + 1)
+    chunks = -(-space.size // CHUNK_GUESSES)
+    record = _record(space)
+    done = HEADER.size + 4 * len(firsts)
+    first = done + len(firsts) * chunks
+    second = first + len(firsts) * record.size
+    end = second + len(firsts) * classes * space.size * record.size
+    return firsts, classes, chunks, done, first, second, end
+
+
+def _header(space):
+    return HEADER.pack(MAGIC, VERSION, space.pegs, int(space.repeats), space.symbols.encode("ascii"), space.size,
+                       (space.pegs + 1) * (space.pegs + 1), len(shapes(space)),
+                       b'H' if space.size < 1 << 16 else b'I')
+
+
+def default_path(space):
+    """
+    Renvoie le chemin du fichier des statistiques de space dans le dossier de cache (voir opening_book.cache_dir).
+    """
+    from opening_book import cache_dir
+
+    return os.path.join(cache_dir(), STATS_FILES % (space.symbols, space.pegs, "r" if space.repeats else ""))
+
+
+def _row(space, guess):
+    row = space.row(guess)
+    return row if isinstance(row, bytes) else bytes(row)
+
+
+def _compute_chunk(task):
+    """
+    Calcule dans un processus de travail les statistiques des seconds essais du paquet chunk pour un premier essai.
+
+    Arguments:
+    - task (tuple) : (colors, config, nom de la table partagée ou None, numéro de la forme, premier essai, numéro
+        du paquet).
+
+    Valeurs de retour:
+    tuple. (numéro de la forme, numéro du paquet, liste des enregistrements (bytes) de chaque réponse codée au
+    premier essai, pour les seconds essais du paquet).
+    """
+    colors, config, table, shape, first, chunk = task
+    space = attach_space(table, colors, config)
+    record = _record(space)
+    classes = (space.pegs + 1) * (space.pegs + 1)
+    row = _row(space, first)
+    masks = [feedback_mask(row, f) for f in range(classes)]  # Solutions de chaque réponse au premier essai
+    possible = [f for f in range(classes) if masks[f].count(1)]  # Réponses possibles au premier essai
+    guesses = range(chunk * CHUNK_GUESSES, min(space.size, (chunk + 1) * CHUNK_GUESSES))
+    # Réponse impossible au premier essai : la même partition vide pour tous les seconds essais
+    blocks = [bytearray() if f in possible else bytearray(_pack(record, [0] * classes) * len(guesses))
+              for f in range(classes)]
+    for second in guesses:
+        second_row = _row(space, second)
+        for f in possible:
+            blocks[f] += _pack(record, _sizes(compress(second_row, masks[f]), classes))
+    return shape, chunk, [bytes(block) for block in blocks]
+
+
+def build(colors=None, config=None, path=None, workers=None, progress=None):
+    """
+    Calcule (ou termine) le fichier des statistiques de partition de l'espace : pour chaque premier essai canonique
+    (voir shapes), la partition de toutes les solutions, et pour chaque réponse à ce premier essai et chaque second
+    essai, la partition des solutions restantes. Chaque partition est gardée avec son pire cas, son nombre de
+    classes et son entropie.
+
+    Le fichier est alloué d'emblée, chaque paquet de seconds essais est écrit à sa place dès qu'il est calculé puis
+    marqué comme terminé : un calcul interrompu reprend là où il s'était arrêté.
+
+    Arguments:
+    - colors (list) : liste de tuples (symbole, nom). Par défaut, DEFAULT_COLORS.
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+    - path (str) : fichier des statistiques (par défaut, dans le dossier de cache, voir default_path).
+    - workers (int) : nombre de processus (par défaut, le nombre de cœurs). 1 : tout dans le processus courant.
+    - progress (callable) : appelé avec (paquets terminés, paquets en tout) après chaque paquet.
+
+    Valeurs de retour:
+    str. Le chemin du fichier.
+    """
+    space = open_space(colors, config)
+    if path is None:
+        path = default_path(space)
+    firsts, classes, chunks, done, first, second, end = _layout(space)
+    record = _record(space)
+    header = _header(space)
+
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read(HEADER.size) != header or os.fstat(f.fileno()).st_size != end:
+                raise ValueError("Le fichier " + path + " n'a pas été écrit pour cet espace")
+    else:  # Nouveau fichier : en-tête, formes et statistiques des premiers essais, le reste est rempli par paquets
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(header)
+            f.write(struct.pack('<%dI' % len(firsts), *firsts))
+            f.write(bytes(len(firsts) * chunks))
+            for guess in firsts:
+                f.write(_pack(record, _sizes(_row(space, guess), classes)))
+            f.truncate(end)
+        os.replace(temporary, path)
+
+    with open(path, "r+b") as f:
+        f.seek(done)
+        flags = f.read(len(firsts) * chunks)
+        pending = [(shape, guess, chunk) for shape, guess in enumerate(firsts) for chunk in range(chunks)
+                   if not flags[shape * chunks + chunk]]
+        finished = len(flags) - len(pending)
+
+        def save(shape, chunk, blocks):
+            for f_index, block in enumerate(blocks):
+                f.seek(second + ((shape * classes + f_index) * space.size + chunk * CHUNK_GUESSES) * record.size)
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())  # Les statistiques sont sur le disque avant que le paquet soit marqué terminé
+            f.seek(done + shape * chunks + chunk)
+            f.write(b'\x01')
+            f.flush()
+
+        if workers == 1 or len(pending) <= 1:
+            for shape, guess, chunk in pending:
+                save(*_compute_chunk((colors, config, None, shape, guess, chunk)))
+                finished += 1
+                if progress is not None:
+                    progress(finished, len(flags))
+        else:
+            from concurrent.futures import ProcessPoolExecutor, as_completed
+
+            table = share_table(colors, config)
+            name = None if table is None else table.name
+            try:
+                with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                    futures = [pool.submit(_compute_chunk, (colors, config, name, shape, guess, chunk))
+                               for shape, guess, chunk in pending]
+                    for future in as_completed(futures):
+                        save(*future.result())
+                        finished += 1
+                        if progress is not None:
+                            progress(finished, len(flags))
+            finally:
+                if table is not None:
+                    table.close()
+    return path
+
+
+class PartitionStats:
+    """
+    Lecture du fichier écrit par build : le fichier est projeté en mémoire et chaque requête ne lit que son
+    enregistrement.
+
+    Les statistiques d'une partition sont un dict {"worst", "classes", "entropy", "sizes"} : taille de la plus
+    grande classe, nombre de classes non vides, entropie en bits et taille de chaque classe (indexée par réponse
+    codée, voir pack_feedback).
+
+    Exemples:
+    >>> from mastermind import pack_feedback
+    >>> stats = PartitionStats(build())
+    >>> stats.first("bjov")["worst"]
+    504
+    >>> stats.second("bjov", pack_feedback(0, 2), "rjvb")["classes"]
+    9
+    """
+
+    def __init__(self, path, colors=None, config=None):
+        self.space = space = get_space(colors, config)
+        self.firsts, self.classes, self.chunks, done, self._first, self._second, end = _layout(space)
+        self.record = _record(space)
+        with open(path, "rb") as f:
+            if f.read(HEADER.size) != _header(space) or os.fstat(f.fileno()).st_size != end:
+                raise ValueError("Le fichier " + path + " n'a pas été écrit pour cet espace")
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._flags = self._data[done:done + len(self.firsts) * self.chunks]
+        self._shapes = {guess: shape for shape, guess in enumerate(self.firsts)}
+
+    def complete(self):
+        """
+        Renvoie True si tous les paquets ont été calculés.
+        """
+        return self._flags.count(0) == 0
+
+    def _stats(self, offset):
+        worst, classes, entropy, *sizes = self.record.unpack_from(self._data, offset)
+        return {"worst": worst, "classes": classes, "entropy": entropy, "sizes": tuple(sizes)}
+
+    def _canonical(self, first):
+        if not isinstance(first, str):
+            first = self.space.decode(first)
+        table = canonical(self.space, first)
+        return table, self._shapes[self.space.encode(first.translate(table))]
+
+    def first(self, guess):
+        """
+        Renvoie les statistiques de la partition de toutes les solutions par le premier essai guess (str ou entier).
+        """
+        table, shape = self._canonical(guess)
+        return self._stats(self._first + shape * self.record.size)
+
+    def second(self, first, feedback, guess):
+        """
+        Renvoie les statistiques de la partition, par le second essai guess, des solutions qui donnent la réponse
+        codée feedback au premier essai first (essais en str ou entiers), ou None si ce paquet n'a pas encore été
+        calculé.
+        """
+        table, shape = self._canonical(first)
+        if not isinstance(guess, str):
+            guess = self.space.decode(guess)
+        guess = self.space.encode(guess.translate(table))
+        if not self._flags[shape * self.chunks + guess // CHUNK_GUESSES]:
+            return None
+        index = (shape * self.classes + feedback) * self.space.size + guess
+        return self._stats(self._second + index * self.record.size)
+
+    def best_second(self, first, feedback, key="entropy"):
+        """
+        Renvoie le meilleur second essai (str) après la réponse feedback au premier essai first : celui qui a la
+        plus grande entropie (key="entropy") ou le plus petit pire cas (key="worst"), ou None si aucun paquet de ce
+        premier essai n'est calculé.
+        """
+        table, shape = self._canonical(first)
+        start = self._second + (shape * self.classes + feedback) * self.space.size * self.record.size
+        best = None
+        best_key = None
+        for guess, (worst, classes, entropy) in enumerate(self._summaries(start)):
+            if not self._flags[shape * self.chunks + guess // CHUNK_GUESSES]:
+                continue
+            value = -entropy if key == "entropy" else worst
+            if best_key is None or value < best_key:
+                best = guess
+                best_key = value
+        if best is None:
+            return None
+        inverse = {v: k for k, v in table.items()}  # Du nom canonique au nom réel des couleurs
+        return ''.join(chr(inverse[ord(symbol)]) for symbol in self.space.decode(best))
+
+    def _summaries(self, start):
+        size = self.record.size
+        for offset in range(start, start + self.space.size * size, size):
+            yield struct.unpack_from('<IHxxf', self._data, offset)
+
+    def close(self):
+        self._data.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    import time
+
+    from mastermind import pack_feedback, GameConfig, DEFAULT_COLORS
+
+    parser = argparse.ArgumentParser(description="Statistiques de partition des premiers et seconds essais")
+    parser.add_argument("--pegs", type=int, default=4)
+    parser.add_argument("--colors", type=int, default=8)
+    parser.add_argument("--repeats", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--path")
+    parser.add_argument("--first", help="premier essai à afficher")
+    parser.add_argument("--answer", help="réponse au premier essai, par exemple 1B2W (avec --first)")
+    args = parser.parse_args()
+
+    config = GameConfig(pegs=args.pegs, colors=args.colors, repeats=args.repeats)
+    colors = list(DEFAULT_COLORS) if config == GameConfig() else config.palette()
+
+    def progress(finished, total):
+        sys.stderr.write("\r%d/%d paquets" % (finished, total))
+
+    start = time.perf_counter()
+    path = build(colors, config, args.path, args.workers, progress)
+    sys.stderr.write("\n")
+    print("%s (%.1f Mo) en %.1f s" % (path, os.path.getsize(path) / 1e6, time.perf_counter() - start))
+    stats = PartitionStats(path, colors, config)
+    if args.first:
+        print(args.first, stats.first(args.first))
+        if args.answer:
+            black, white = args.answer.upper().rstrip("W").split("B")
+            feedback = pack_feedback(int(black), int(white), config.pegs)
+            best = stats.best_second(args.first, feedback)
+            print("meilleur second essai :", best, stats.second(args.first, feedback, best))
@@ -0,0 +1,271 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Serveur de parties de Mastermind : une boucle asyncio, une partie par connexion TCP
+
+import asyncio
+import random
+
+from game_log import GameRecorder
+from mastermind import Game, get_space, DEFAULT_COLORS
+from snapshot import attach_space, share_table
+
+SESSION_TIMEOUT = 300  # Secondes d'inactivité avant de fermer une session
+ENCODING = "utf-8"
+
+# Protocole (une commande par ligne, une réponse par ligne) :
+#   START          -> STARTED <essais>
+#   GUESS <comb>   -> SCORE <bien placés> <mal placés> <essais restants>
+#                     WIN <essais utilisés> | LOSE <bien placés> <mal placés> <solution>
+#                     INVALID <message> ; <message> ...
+#   STATUS         -> STATUS <état> <essais restants> <essais utilisés>
+#   QUIT           -> BYE
+#   autre          -> ERROR <message>
+# Une ligne plus longue que la limite du StreamReader (64 Kio) reçoit "ERROR Ligne trop longue" et ferme la connexion.
+
+
+def handle_command(session, line):
+    """
+    Exécute une ligne du protocole sur la partie session.
+
+    Arguments:
+    - session (Game) : partie du client.
+    - line (str) : commande reçue, sans le retour à la ligne.
+
+    Valeurs de retour:
+    str ou None. La réponse à envoyer, ou None pour fermer la connexion après "BYE".
+
+    Exemples:
+    >>> session = Game(secret="bjov")
+    >>> handle_command(session, "START")
+    'STARTED 10'
+    >>> handle_command(session, "GUESS borv")
+    'SCORE 2 1 9'
+    """
+    parts = line.split()
+    if not parts:
+        return "ERROR Commande vide"
+    command = parts[0].upper()
+
+    if command == "START":
+        return "STARTED " + str(session.start()["tries_left"])
+    if command == "GUESS":
+        if len(parts) != 2:
+            return "ERROR Usage : GUESS <combinaison>"
+        result = session.submit_guess(parts[1])
+        if not result["valid"]:
+            return "INVALID " + " ; ".join(result["errors"])
+        if result["state"] == "won":
+            return "WIN " + str(session.attempts)
+        if result["state"] == "lost":
+            return "LOSE %d %d %s" % (result["black"], result["white"], session.secret)
+        return "SCORE %d %d %d" % (result["black"], result["white"], result["tries_left"])
+    if command == "STATUS":
+        status = session.status()
+        return "STATUS %s %d %d" % (status["state"], status["tries_left"], status["attempts"])
+    if command == "QUIT":
+        return None
+    return "ERROR Commande inconnue : " + command
+
+
+class GameServer:
+    """
+    Serveur TCP qui héberge une partie (Game) par connexion, toutes dans la même boucle asyncio.
+
+    La validation et le score d'un essai sont des lectures de tables en temps constant : ils sont faits
+    directement dans la boucle, sans la bloquer. Une session inactive plus de timeout secondes est fermée.
+    Avec log_path, chaque essai est ajouté au journal binaire (voir game_log.py).
+    """
+
+    def __init__(self, colors=None, config=None, timeout=SESSION_TIMEOUT, seed=None, log_path=None):
+        self.colors = list(DEFAULT_COLORS) if colors is None else colors
+        self.config = config
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.sessions = 0  # Nombre de sessions ouvertes
+        self.recorder = None if log_path is None else GameRecorder(log_path, get_space(self.colors, config))
+        self.server = None
+
+    async def handle_client(self, reader, writer):
+        session = Game(self.colors, self.config, self.rng, recorder=self.recorder)
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.timeout)
+                except asyncio.TimeoutError:
+                    writer.write(b"ERROR Session expiree\n")
+                    break
+                except ValueError:  # Ligne plus longue que la limite du StreamReader (LimitOverrunError)
+                    writer.write(b"ERROR Ligne trop longue\n")
+                    break
+                if not line:  # Le client a fermé la connexion
+                    break
+                answer = handle_command(session, line.decode(ENCODING, "replace").strip())
+                if answer is None:
+                    writer.write(b"BYE\n")
+                    break
+                writer.write(answer.encode(ENCODING) + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host="127.0.0.1", port=7777, reuse_port=False):
+        """
+        Ouvre le port d'écoute et renvoie le serveur asyncio (port=0 : un port libre, voir self.port()).
+        Avec reuse_port, plusieurs processus peuvent écouter sur le même port (voir serve_workers).
+        """
+        self.server = await asyncio.start_server(self.handle_client, host, port, backlog=4096,
+                                                 reuse_port=reuse_port or None)
+        return self.server
+
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host="127.0.0.1", port=7777, reuse_port=False):
+        await self.start(host, port, reuse_port)
+        async with self.server:
+            await self.server.serve_forever()
+
+
+def _serve_worker(table, host, port, timeout, log_path):
+    attach_space(table)  # Table en mémoire partagée du processus principal, ou table locale à défaut
+    server = GameServer(timeout=timeout, log_path=log_path)
+    try:
+        asyncio.run(server.serve_forever(host, port, reuse_port=True))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server.recorder is not None:
+            server.recorder.close()
+
+
+def serve_workers(host="127.0.0.1", port=7777, workers=2, timeout=SESSION_TIMEOUT, log_path=None):
+    """
+    Lance workers processus serveurs qui écoutent tous sur le même port (SO_REUSEPORT : le système répartit les
+    connexions). La table des réponses est construite une seule fois ici, dans une SharedTable que les processus
+    lisent sans la copier ; elle est supprimée quand les processus s'arrêtent. Avec log_path, chaque processus a son
+    propre journal (log_path.0, log_path.1...).
+    """
+    import multiprocessing
+    import signal
+
+    table = share_table()
+    name = None if table is None else table.name
+    processes = [multiprocessing.Process(target=_serve_worker,
+                                         args=(name, host, port, timeout,
+                                               None if log_path is None else "%s.%d" % (log_path, i)))
+                 for i in range(workers)]
+    try:
+        for process in processes:
+            process.start()
+        signal.signal(signal.SIGTERM, signal.default_int_handler)  # kill : le segment est supprimé comme avec Ctrl-C
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # Un second signal n'interrompt pas le nettoyage
+        for process in processes:
+            process.terminate()
+            process.join()
+        if table is not None:
+            table.close()
+
+
+async def play_client(host, port, games, strategy="first"):
+    """
+    Client de test : joue games parties avec le solveur et renvoie le nombre de parties gagnées.
+    """
+    from solver import Solver
+
+    reader, writer = await asyncio.open_connection(host, port)
+    solver = Solver(strategy=strategy)
+    wins = 0
+    for i in range(games):
+        writer.write(b"START\n")
+        await reader.readline()
+        solver.reset()
+        while True:
+            comb = solver.next_guess()
+            writer.write(b"GUESS " + comb.encode(ENCODING) + b"\n")
+            answer = (await reader.readline()).decode(ENCODING).split()
+            if answer[0] == "WIN":
+                wins += 1
+                break
+            if answer[0] != "SCORE":
+                break
+            solver.observe(comb, int(answer[1]), int(answer[2]))
+    writer.write(b"QUIT\n")
+    await reader.readline()
+    writer.close()
+    await writer.wait_closed()
+    return wins
+
+
+async def load_test(host, port, clients, games, strategy="first"):
+    """
+    Générateur de charge : clients connexions simultanées qui jouent chacune games parties.
+
+    Valeurs de retour:
+    dict. {"clients", "games", "wins", "seconds", "games_per_second"}.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    wins = await asyncio.gather(*(play_client(host, port, games, strategy) for i in range(clients)))
+    seconds = loop.time() - start
+    total = clients * games
+    return {"clients": clients, "games": total, "wins": sum(wins), "seconds": seconds,
+            "games_per_second": total / seconds}
+
+
+async def _local_load_test(clients, games, log_path=None):
+    server = GameServer(log_path=log_path)
+    await server.start(port=0)
+    try:
+        async with server.server:
+            return await load_test("127.0.0.1", server.port(), clients, games)
+    finally:
+        if server.recorder is not None:
+            server.recorder.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serveur de parties de Mastermind")
+    parser.add_argument("mode", choices=["serve", "load", "selftest"],
+                        help="serve : serveur ; load : charge contre --host/--port ; selftest : les deux en local")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=SESSION_TIMEOUT)
+    parser.add_argument("--log", help="journal binaire des parties (voir game_log.py)")
+    parser.add_argument("--workers", type=int, default=1, help="serve : nombre de processus serveurs")
+    args = parser.parse_args()
+
+    if args.mode == "serve" and args.workers > 1:
+        serve_workers(args.host, args.port, args.workers, args.timeout, args.log)
+    elif args.mode == "serve":
+        server = GameServer(timeout=args.timeout, log_path=args.log)
+        try:
+            asyncio.run(server.serve_forever(args.host, args.port))
+        finally:
+            if server.recorder is not None:
+                server.recorder.close()
+    else:
+        if args.mode == "load":
+            result = asyncio.run(load_test(args.host, args.port, args.clients, args.games))
+        else:
+            result = asyncio.run(_local_load_test(args.clients, args.games, args.log))
+        print("%(clients)d clients, %(games)d parties (%(wins)d gagnées) en %(seconds).2f s : "
+              "%(games_per_second).0f parties/s" % result)
@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Simulation de parties de Mastermind jouées par le solveur, sans affichage
+
+import os
+from collections import Counter
+
+from mastermind import unpack_feedback, SecretGenerator, DEFAULT_CONFIG, TRIES
+from opening_book import open_book
+from snapshot import attach_space, open_space, share_table
+from solver import Solver
+
+
+def play_headless(solver, secret, tries=TRIES):
+    """
+    Joue une partie complète sans input() ni print().
+
+    Arguments:
+    - solver (Solver) : joueur automatique, remis à zéro au début de la partie.
+    - secret (int) : entier de la solution dans solver.space.
+    - tries (int) : nombre d'essais accordés.
+
+    Valeurs de retour:
+    int. Le nombre d'essais utilisés pour gagner, ou 0 si la partie est perdue.
+    """
+    space = solver.space
+    solver.reset()
+    for attempt in range(1, tries + 1):
+        guess = solver.choose()
+        if guess == secret:
+            return attempt
+        black, white = unpack_feedback(space.feedback(guess, secret), space.pegs)
+        solver.observe(space.decode(guess), black, white)
+    return 0
+
+
+def _run_chunk(task):
+    """
+    Joue un paquet de parties dans un processus de travail.
+
+    Arguments:
+    - task (tuple) : (graine, numéro du paquet, nombre de parties, stratégie, colors, config, livre d'ouvertures,
+        nom du segment de mémoire partagée de la table ou None).
+
+    Valeurs de retour:
+    Counter. Nombre de parties par nombre d'essais utilisés (0 pour une défaite).
+    """
+    seed, chunk, count, strategy, colors, config, book, table = task
+    attach_space(table, colors, config)  # Projette la table du processus principal
+    solver = Solver(colors, strategy, config, open_book(colors, config, strategy) if book else None)
+    tries = (config or DEFAULT_CONFIG).tries
+    secrets = SecretGenerator(solver.space, seed).spawn(chunk).batch(count)  # Suite propre et reproductible par paquet
+    histogram = Counter()
+    for secret in secrets:
+        histogram[play_headless(solver, secret, tries)] += 1
+    return histogram
+
+
+def simulate(n_games, strategy="minimax", workers=None, colors=None, seed=0, chunk_size=100, config=None,
+             book=True, shared=True):
+    """
+    Joue n_games parties sur un pool de processus et agrège les résultats.
+
+    Arguments:
+    - n_games (int) : nombre de parties à jouer.
+    - strategy (str) : nom d'une stratégie de solver.STRATEGIES.
+    - workers (int) : nombre de processus (par défaut, le nombre de cœurs). 1 : tout dans le processus courant.
+    - colors (list) : liste de tuples (symbole, nom). Par défaut, DEFAULT_COLORS.
+    - seed : graine des solutions ; la même graine rejoue les mêmes solutions quel que soit workers.
+    - chunk_size (int) : nombre de parties envoyées d'un coup à un processus.
+    - config (GameConfig) : variante du jeu (pions, répétitions, nombre d'essais). Par défaut, DEFAULT_CONFIG.
+    - book (bool) : True pour jouer les premiers coups avec le livre d'ouvertures (voir opening_book.py).
+    - shared (bool) : True pour que les processus lisent tous la même table en mémoire partagée (voir
+        snapshot.SharedTable) plutôt que de projeter chacun l'instantané du disque.
+
+    Valeurs de retour:
+    dict. {"games", "wins", "losses", "histogram"} où histogram associe à chaque nombre d'essais le nombre de
+    parties gagnées en autant d'essais.
+
+    Exemples:
+    >>> simulate(1000, "minimax", workers=4)["losses"]
+    0
+    """
+    open_space(colors, config)  # La table est calculée (ou projetée) ici, les processus ne font que la projeter
+    if book:  # Le livre est calculé une seule fois ici, les processus ne font que le projeter en mémoire
+        open_book(colors, config, strategy)
+    table = share_table(colors, config) if shared and workers != 1 else None
+    name = None if table is None else table.name
+    tasks = []
+    for chunk, start in enumerate(range(0, n_games, chunk_size)):
+        tasks.append((seed, chunk, min(chunk_size, n_games - start), strategy, colors, config, book, name))
+
+    total = Counter()
+    try:
+        if workers == 1:
+            for task in tasks:
+                total.update(_run_chunk(task))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                for histogram in pool.map(_run_chunk, tasks):
+                    total.update(histogram)
+    finally:
+        if table is not None:
+            table.close()
+
+    losses = total.pop(0, 0)
+    return {
+        "games": n_games,
+        "wins": n_games - losses,
+        "losses": losses,
+        "histogram": dict(sorted(total.items())),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simulation de parties de Mastermind jouées par le solveur")
+    parser.add_argument("games", type=int, help="nombre de parties")
+    parser.add_argument("--strategy", default="minimax")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--local-tables", dest="shared", action="store_false",
+                        help="une table par processus plutôt qu'une table en mémoire partagée")
+    args = parser.parse_args()
+
+    result = simulate(args.games, args.strategy, args.workers, seed=args.seed, shared=args.shared)
+    print("Parties :", result["games"], "- gagnées :", result["wins"], "- perdues :", result["losses"])
+    for attempts, count in result["histogram"].items():
+        print("   ", attempts, "essai(s) :", count)
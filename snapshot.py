@@ -0,0 +1,235 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Instantané de la table des réponses d'un espace : calculée une fois, puis projetée en mémoire à chaque démarrage
+# ou partagée entre les processus de travail
+
+import atexit
+import gc
+import mmap
+import os
+import struct
+
+from mastermind import get_space
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:  # Python < 3.8 : pas de mémoire partagée, chaque processus projette l'instantané
+    shared_memory = None
+
+MAGIC = b'MMTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHBB24sI')  # magic, version, pions, répétitions, symboles de l'espace, taille
+SPACE_FILES = "table-%s-%d%s.bin"  # Nom du fichier d'un espace : symboles, pions, "r" avec répétitions
+
+
+def _header(space):
+    return HEADER.pack(MAGIC, VERSION, space.pegs, int(space.repeats), space.symbols.encode("ascii"), space.size)
+
+
+def default_path(space):
+    """
+    Renvoie le chemin de l'instantané de space dans le dossier de cache (voir opening_book.cache_dir).
+    """
+    from opening_book import cache_dir
+
+    return os.path.join(cache_dir(), SPACE_FILES % (space.symbols, space.pegs, "r" if space.repeats else ""))
+
+
+def save_table(space, path):
+    """
+    Calcule toutes les lignes de la table de space et l'écrit dans path, par un fichier temporaire renommé.
+    """
+    for guess in range(space.size):
+        space.row(guess)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(_header(space))
+        f.write(space._table)  # Un octet par réponse : aucun problème de boutisme
+    os.replace(temporary, path)
+
+
+def load_table(space, path):
+    """
+    Projette en mémoire (mmap) la table de path et la donne à space, sans la lire.
+
+    Valeurs de retour:
+    bool. False si le fichier n'existe pas ou n'a pas été écrit pour cet espace (ou par une autre version).
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return False
+    with f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Fichier vide
+            return False
+    if len(data) != HEADER.size + space.size * space.size or data[:HEADER.size] != _header(space):
+        data.close()
+        return False
+    space.attach_table(memoryview(data)[HEADER.size:])
+    return True
+
+
+def open_space(colors=None, config=None, path=None):
+    """
+    Renvoie l'espace des combinaisons (voir get_space) avec sa table complète : celle de l'instantané s'il est à
+    jour, sinon une table calculée puis sauvegardée pour les prochains démarrages. Les espaces trop grands pour
+    avoir une table sont renvoyés tels quels.
+
+    Exemples:
+    >>> space = open_space()
+    >>> space.feedback(space.encode("borv"), space.encode("bjov"))
+    11
+    """
+    space = get_space(colors, config)
+    if not space.has_table() or space.table_complete():
+        return space
+    if path is None:
+        path = default_path(space)
+    if not load_table(space, path):
+        save_table(space, path)
+    return space
+
+
+class SharedTable:
+    """
+    Table complète d'un espace copiée une seule fois, par le processus principal, dans un segment de mémoire
+    partagée : les processus de travail la projettent en lecture seule avec attach_space au lieu d'en garder
+    chacun une copie.
+
+    Le segment est supprimé par close (ou à la sortie du bloc with, ou à la fin du processus principal).
+
+    Exemples:
+    >>> with SharedTable(open_space()) as table:
+    ...     space = attach_space(table.name)  # Dans un processus de travail
+    """
+
+    def __init__(self, space):
+        size = space.size * space.size
+        self.memory = shared_memory.SharedMemory(create=True, size=HEADER.size + size)
+        self.name = self.memory.name
+        self.memory.buf[:HEADER.size] = _header(space)
+        self.memory.buf[HEADER.size:HEADER.size + size] = space._table
+        atexit.register(self.close)  # Le segment ne doit pas survivre au processus qui l'a créé
+
+    def close(self):
+        if self.memory is not None:
+            atexit.unregister(self.close)
+            self.memory.close()
+            self.memory.unlink()
+            self.memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def share_table(colors=None, config=None):
+    """
+    Renvoie la SharedTable de l'espace (voir open_space), ou None si la mémoire partagée n'est pas disponible ou si
+    l'espace est trop grand pour avoir une table : les processus de travail utilisent alors leur propre table.
+    """
+    space = open_space(colors, config)
+    if shared_memory is None or not space.has_table():
+        return None
+    try:
+        return SharedTable(space)
+    except OSError:  # Pas de /dev/shm, quota atteint...
+        return None
+
+
+_attached = {}  # Nom -> (segment, espace) projetés par ce processus, gardés ouverts tant que leur table sert
+
+
+def _detach():
+    # Les vues sur un segment doivent disparaître avant de le fermer
+    for memory, space in _attached.values():
+        space.detach_table()
+    gc.collect()
+    for memory, space in _attached.values():
+        try:
+            memory.close()
+        except BufferError:  # Une vue est encore utilisée quelque part : le système la libérera
+            pass
+    _attached.clear()
+
+
+def attach_space(name, colors=None, config=None):
+    """
+    Renvoie l'espace des combinaisons avec la table du segment de mémoire partagée name (voir SharedTable), en
+    lecture seule. Si name est None ou si le segment n'existe pas (ou pas pour cet espace), l'espace a sa propre
+    table, comme avec open_space.
+    """
+    space = get_space(colors, config)
+    if name is None or shared_memory is None or not space.has_table():
+        return open_space(colors, config)
+    if name in _attached:
+        return space
+    try:
+        memory = shared_memory.SharedMemory(name=name)
+    except (OSError, ValueError):
+        return open_space(colors, config)
+    size = space.size * space.size
+    if memory.size < HEADER.size + size or bytes(memory.buf[:HEADER.size]) != _header(space):
+        memory.close()
+        return open_space(colors, config)
+    if not _attached:
+        atexit.register(_detach)
+    _attached[name] = (memory, space)
+    space.attach_table(memory.buf[HEADER.size:HEADER.size + size].toreadonly())
+    return space
+
+
+if __name__ == "__main__":  # Temps de démarrage : du lancement de python à la première question posée au joueur
+    import subprocess
+    import sys
+    import time
+
+    from mastermind import CodeSpace, GameConfig
+
+    def cold_start(args, prompt=None, repeat=5):
+        """
+        Renvoie le meilleur temps (en secondes) entre le lancement de args et l'apparition de prompt sur sa sortie
+        (sans prompt : la fin du processus).
+        """
+        best = None
+        for i in range(repeat):
+            start = time.perf_counter()
+            process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)))
+            output = b''
+            while prompt is not None and prompt not in output:
+                data = os.read(process.stdout.fileno(), 4096)
+                if not data:
+                    break
+                output += data
+            if prompt is None:
+                process.communicate()
+            seconds = time.perf_counter() - start
+            process.kill()
+            process.wait()
+            best = seconds if best is None else min(best, seconds)
+        return best
+
+    for config in [GameConfig(), GameConfig(pegs=4, colors=6, repeats=True)]:
+        space = open_space(config.palette(), config)  # Écrit l'instantané s'il manque
+        start = time.perf_counter()
+        built = CodeSpace(space.symbols, config)
+        for guess in range(built.size):
+            built.row(guess)
+        build = time.perf_counter() - start
+        fresh = CodeSpace(space.symbols, config)
+        start = time.perf_counter()
+        load_table(fresh, default_path(space))
+        mapped = time.perf_counter() - start
+        print("Espace %s : table calculée en %.1f ms, projetée en %.2f ms" % (space.symbols, build * 1e3, mapped * 1e3))
+    prompt = b"Devinez la combinaison"
+    print("Python seul : %.1f ms" % (cold_start([sys.executable, "-c", "pass"]) * 1e3))
+    print("Import de mastermind : %.1f ms" % (cold_start([sys.executable, "-c", "import mastermind"]) * 1e3))
+    print("Jeu en console, première question : %.1f ms" % (cold_start([sys.executable, "mastermind.py"], prompt) * 1e3))
+    print("Solveur, premier essai : %.1f ms" % (cold_start([sys.executable, "-u", "solver.py"], prompt) * 1e3))
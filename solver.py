@@ -0,0 +1,268 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Solveur automatique du Mastermind
+
+from collections import Counter, OrderedDict
+from math import log2
+from operator import itemgetter
+
+from mastermind import get_space, pack_feedback, full_game, CandidateSet, DEFAULT_COLORS
+
+
+def score_minimax(sizes):
+    """
+    Stratégie de Knuth : la taille de la plus grande partition (le pire cas).
+    """
+    return max(sizes)
+
+
+def score_expected(sizes):
+    """
+    Taille moyenne de la partition où tombera la solution (à un facteur 1/nombre de candidats près).
+    """
+    return sum(size * size for size in sizes)
+
+
+def score_entropy(sizes):
+    """
+    Opposé de l'entropie de la partition (à une constante près) : plus c'est petit, plus l'essai informe.
+    """
+    return sum(size * log2(size) for size in sizes)
+
+
+# Nom de la stratégie -> fonction de coût des tailles de partition (à minimiser). None : premier candidat.
+STRATEGIES = {
+    "minimax": score_minimax,
+    "expected": score_expected,
+    "entropy": score_entropy,
+    "first": None,
+}
+
+
+DECISION_CACHE_SIZE = 100000  # Nombre de décisions gardées en mémoire par espace et par stratégie
+CLASS_CACHE_SIZE = 256  # Nombre d'ensembles de couleurs jouées dont on garde les représentants des essais
+
+
+class LRUCache:
+    """
+    Dictionnaire de taille bornée qui oublie d'abord les entrées utilisées le moins récemment.
+    """
+
+    def __init__(self, maxsize=DECISION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """
+        Renvoie la valeur associée à key (None si absente) et la marque comme récemment utilisée.
+        """
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """
+        Associe value à key, en oubliant l'entrée la plus ancienne si le cache est plein.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_decisions = {}  # LRUCache des essais déjà choisis, par (alphabet, nombre de pions, répétitions, stratégie)
+
+
+def decision_cache(space, strategy):
+    """
+    Renvoie le cache des décisions de la stratégie dans l'espace space, indexé par l'historique de la partie.
+    """
+    key = (space.symbols, space.pegs, space.repeats, strategy)
+    if key not in _decisions:
+        _decisions[key] = LRUCache()
+    return _decisions[key]
+
+
+_classes = LRUCache(CLASS_CACHE_SIZE)  # (alphabet, pions, répétitions, couleurs jouées) -> représentants
+
+
+def guess_classes(space, played):
+    """
+    Renvoie le plus petit entier de chaque groupe d'essais qui ne diffèrent que par des couleurs absentes de played
+    (les couleurs déjà jouées). Comme les candidats ne distinguent pas les couleurs jamais jouées, tous les essais
+    d'un groupe donnent les mêmes tailles de partition et sont candidats ou non ensemble.
+
+    Les groupes sont énumérés directement (une couleur jouée, ou une couleur libre déjà utilisée, ou la suivante),
+    sans parcourir l'espace, et gardés pour chaque ensemble de couleurs jouées.
+
+    Arguments:
+    - space (CodeSpace) : espace des combinaisons.
+    - played (frozenset) : symboles des couleurs déjà jouées.
+
+    Valeurs de retour:
+    list. Les entiers des représentants, dans l'ordre croissant.
+
+    Exemples:
+    >>> [get_space().decode(code) for code in guess_classes(get_space(), frozenset())]
+    ['bcfj']
+    """
+    key = (space.symbols, space.pegs, space.repeats, played)
+    found = _classes.get(key)
+    if found is not None:
+        return found
+    free = [symbol for symbol in space.symbols if symbol not in played]  # Dans l'ordre : le plus petit entier
+    found = []
+
+    def extend(comb, used):
+        if len(comb) == space.pegs:
+            found.append(space.encode(comb))
+            return
+        for symbol in space.symbols:
+            if symbol not in played and symbol not in free[:used + 1]:
+                continue
+            if not space.repeats and symbol in comb:
+                continue
+            extend(comb + symbol, used + (used < len(free) and symbol == free[used]))
+
+    extend("", 0)
+    found.sort()
+    _classes.put(key, found)
+    return found
+
+
+def partition_sizes(row, getter):
+    """
+    Renvoie la taille de chaque classe de réponse que produit un essai sur les candidats.
+
+    Arguments:
+    - row (bytes) : réponses de l'essai contre toutes les combinaisons (CodeSpace.row).
+    - getter (itemgetter) : extrait de row les réponses des candidats (au moins 2 candidats).
+
+    Valeurs de retour:
+    list. Les tailles des partitions non vides.
+    """
+    return list(Counter(getter(row)).values())
+
+
+class Solver:
+    """
+    Joueur automatique : garde les combinaisons compatibles avec toutes les réponses reçues et choisit chaque
+    essai avec une stratégie de STRATEGIES.
+
+    Exemples:
+    >>> solver = Solver(strategy="minimax")
+    >>> solver.next_guess()
+    'bcfj'
+    >>> solver.observe('bcfj', 1, 2)
+    """
+
+    def __init__(self, colors=None, strategy="minimax", config=None, book=None):
+        if strategy not in STRATEGIES:
+            raise ValueError("Stratégie inconnue : " + str(strategy))
+        self.space = get_space(colors, config)
+        self.strategy = strategy
+        self.score = STRATEGIES[strategy]
+        self.book = book  # OpeningBook (voir opening_book.py) qui répond sans calcul aux coups qu'il contient
+        self.decisions = decision_cache(self.space, strategy)
+        self.reset()
+
+    def reset(self):
+        """
+        Recommence une partie : toutes les combinaisons redeviennent candidates.
+        """
+        self.candidates = CandidateSet(self.space)
+        self.history = []  # Liste des (essai, réponse codée) déjà joués
+
+    def restore(self, candidates, history):
+        """
+        Replace le solveur dans l'état d'une partie en cours.
+
+        Arguments:
+        - candidates (CandidateSet) : candidats restants.
+        - history (list) : liste des (essai, réponse codée) déjà joués.
+        """
+        self.candidates = candidates
+        self.history = history
+
+    def choose(self):
+        """
+        Renvoie l'entier du prochain essai selon la stratégie.
+        """
+        candidates = self.candidates
+        if self.score is None or len(candidates) <= 2:  # Avec 2 candidats, jouer l'un des deux est optimal
+            return next(iter(candidates))
+        if self.book is not None:
+            guess = self.book.lookup(self.history)
+            if guess is not None:
+                return guess
+        key = tuple(self.history)  # L'essai ne dépend que des coups déjà joués et de leurs réponses
+        guess = self.decisions.get(key)
+        if guess is None:
+            guess = self._best_guess()
+            self.decisions.put(key, guess)
+        return guess
+
+    def _best_guess(self):
+        candidates = list(self.candidates)
+        getter = itemgetter(*candidates)
+        alive = set(candidates)
+        best = None
+        best_key = None
+        for guess in self._guess_pool(alive):
+            sizes = partition_sizes(self.space.row(guess), getter)
+            key = (self.score(sizes), guess not in alive)
+            if best_key is None or key < best_key:  # À coût égal, on préfère un candidat (il peut gagner)
+                best = guess
+                best_key = key
+                if len(sizes) == len(candidates) and guess in alive:  # Que des singletons : impossible de faire mieux
+                    break
+        return best
+
+    def _guess_pool(self, alive):
+        """
+        Renvoie les essais à évaluer : un seul représentant de chaque groupe d'essais qui ne diffèrent que par des
+        couleurs jamais jouées (voir guess_classes), les candidats d'abord.
+        """
+        played = set()
+        for guess, feedback in self.history:
+            played.update(self.space.decode(guess))
+        classes = guess_classes(self.space, frozenset(played))
+        return [guess for guess in classes if guess in alive] + [guess for guess in classes if guess not in alive]
+
+    def next_guess(self):
+        """
+        Renvoie le prochain essai (str).
+        """
+        return self.space.decode(self.choose())
+
+    def observe(self, comb, black, white):
+        """
+        Ne garde que les candidats qui auraient donné la même réponse à l'essai comb.
+
+        Arguments:
+        - comb (str) : essai joué.
+        - black (int) : nombre de pions bien placés reçus.
+        - white (int) : nombre de pions de bonne couleur mais mal placés reçus.
+        """
+        guess = self.space.encode(comb)
+        feedback = pack_feedback(black, white, self.space.pegs)
+        self.candidates.filter(guess, feedback)
+        self.history.append((guess, feedback))
+
+
+if __name__ == "__main__":  # Une partie jouée par l'ordinateur
+    import sys
+
+    from opening_book import open_book
+    from snapshot import open_space
+
+    colors = list(DEFAULT_COLORS)
+    strategy = sys.argv[1] if len(sys.argv) > 1 else "minimax"
+    open_space(colors)  # Table des réponses projetée depuis le cache plutôt que recalculée
+    full_game(colors, Solver(colors, strategy, book=open_book(colors, strategy=strategy)))
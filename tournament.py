@@ -0,0 +1,300 @@
+#!/usr/bin/python3
+
+# -*-coding:utf-8 -*
+
+# Tournoi : plusieurs stratégies du solveur sur les mêmes solutions, comparées entre elles et aux parties humaines
+
+import csv
+import math
+import os
+import time
+from collections import Counter, deque
+
+from game_log import GameLog
+from mastermind import SecretGenerator, DEFAULT_CONFIG
+from opening_book import open_book
+from simulation import play_headless
+from snapshot import attach_space, open_space, share_table
+from solver import Solver
+
+CHUNK_SIZE = 100  # Nombre de parties envoyées d'un coup à un processus
+HUMAN = "humain"  # Nom du joueur des parties lues dans les journaux
+DRAWN = "tirage"  # Jeu de solutions tirées avec la graine du tournoi
+REPLAY = "rejeu"  # Jeu des solutions des parties humaines, rejouées par chaque stratégie
+FIELDS = ["joueur", "jeu", "solution", "essais", "gagnee", "secondes", "coups_chronometres"]
+PERCENTILES = (50, 90, 99)
+
+
+class Summary:
+    """
+    Statistiques d'un joueur sur un jeu de solutions, tenues à jour partie par partie : seuls des compteurs sont
+    gardés, la mémoire ne dépend donc pas du nombre de parties.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.attempts = Counter()  # Nombre d'essais des parties gagnées -> nombre de parties
+        self.seconds = 0.0
+        self.timed_moves = 0
+
+    def add(self, attempts, won, seconds, timed_moves):
+        self.games += 1
+        if won:
+            self.attempts[attempts] += 1
+        self.seconds += seconds
+        self.timed_moves += timed_moves
+
+    def percentile(self, p):
+        """
+        Renvoie le p-ième centile (rang le plus proche) du nombre d'essais des parties gagnées.
+        """
+        wins = sum(self.attempts.values())
+        rank = max(1, math.ceil(p / 100 * wins))
+        seen = 0
+        for attempts in sorted(self.attempts):
+            seen += self.attempts[attempts]
+            if seen >= rank:
+                return attempts
+        return 0
+
+    def report(self):
+        """
+        Valeurs de retour:
+        dict. {"games", "mean", "worst", "failure_rate", "per_move", "p50", "p90", "p99"} : moyenne, pire cas et
+        centiles des essais des parties gagnées, proportion de parties perdues et secondes par coup.
+        """
+        wins = sum(self.attempts.values())
+        result = {
+            "games": self.games,
+            "mean": sum(a * count for a, count in self.attempts.items()) / wins if wins else 0.0,
+            "worst": max(self.attempts) if wins else 0,
+            "failure_rate": (self.games - wins) / self.games if self.games else 0.0,
+            "per_move": self.seconds / self.timed_moves if self.timed_moves else 0.0,
+        }
+        for p in PERCENTILES:
+            result["p%d" % p] = self.percentile(p)
+        return result
+
+
+def summarize(rows):
+    """
+    Calcule le rapport d'un tournoi à partir de ses résultats (ceux de tournament ou de read_results).
+
+    Arguments:
+    - rows (iterable) : tuples (joueur, jeu, solution, essais, gagnée, secondes, coups chronométrés).
+
+    Valeurs de retour:
+    dict. (joueur, jeu) -> rapport de Summary.report.
+    """
+    summaries = {}
+    for player, kind, secret, attempts, won, seconds, timed_moves in rows:
+        summary = summaries.get((player, kind))
+        if summary is None:
+            summary = summaries[(player, kind)] = Summary()
+        summary.add(attempts, won, seconds, timed_moves)
+    return {key: summary.report() for key, summary in summaries.items()}
+
+
+def read_results(path):
+    """
+    Génère les résultats écrits par tournament dans path, un par partie, sans charger le fichier.
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)  # Noms des colonnes
+        for player, kind, secret, attempts, won, seconds, timed_moves in reader:
+            yield player, kind, int(secret), int(attempts), won == "1", float(seconds), int(timed_moves)
+
+
+def human_games(path, space):
+    """
+    Génère les parties terminées d'un journal de parties humaines (voir mastermind(log_path=...)).
+
+    Le journal n'horodate que les essais : le temps par coup d'un joueur humain est mesuré entre son premier et son
+    dernier essai, le premier coup n'est donc pas chronométré.
+
+    Valeurs de retour:
+    Des tuples (solution, essais, gagnée, secondes, coups chronométrés).
+    """
+    log = GameLog(path)
+    if (log.space.symbols, log.space.pegs, log.space.repeats) != (space.symbols, space.pegs, space.repeats):
+        raise ValueError("Le journal " + path + " a été écrit pour un autre espace de combinaisons")
+    for session, secret, moves in log.games():
+        if secret is None:  # Partie abandonnée
+            continue
+        guess, black, white, timestamp = moves[-1]
+        yield secret, len(moves), black == space.pegs, (timestamp - moves[0][3]) / 1e9, len(moves) - 1
+
+
+def _play_chunk(task):
+    """
+    Joue dans un processus de travail les parties d'une stratégie sur un paquet de solutions.
+
+    Arguments:
+    - task (tuple) : (stratégie, jeu, colors, config, livre d'ouvertures, nom de la table partagée ou None,
+        array('I') des solutions).
+
+    Valeurs de retour:
+    tuple. (stratégie, jeu, liste des (solution, essais, gagnée, secondes, coups chronométrés)).
+    """
+    strategy, kind, colors, config, book, table, secrets = task
+    attach_space(table, colors, config)
+    solver = Solver(colors, strategy, config, open_book(colors, config, strategy) if book else None)
+    tries = (config or DEFAULT_CONFIG).tries
+    clock = time.perf_counter
+    results = []
+    for secret in secrets:
+        start = clock()
+        attempts = play_headless(solver, secret, tries)
+        seconds = clock() - start
+        results.append((secret, attempts or tries, attempts != 0, seconds, attempts or tries))
+    return strategy, kind, results
+
+
+def _bounded_map(pool, func, tasks, window):
+    # Comme pool.map, dans l'ordre, mais sans jamais avoir plus de window paquets en cours : les tâches sont
+    # produites au fur et à mesure et les résultats écrits dès qu'ils arrivent
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def tournament(strategies, games, seed=0, workers=None, colors=None, config=None, human_logs=(), out_path=None,
+               book=True, chunk_size=CHUNK_SIZE):
+    """
+    Fait jouer chaque stratégie sur les mêmes games solutions tirées avec seed, avec le nombre d'essais de game()
+    (config.tries), puis sur les solutions des parties humaines des journaux human_logs.
+
+    Les résultats de chaque partie sont écrits dans out_path (CSV, voir read_results) dès qu'un paquet est terminé,
+    et le rapport est tenu à jour avec des compteurs : la mémoire utilisée ne dépend pas du nombre de parties.
+
+    Arguments:
+    - strategies (list) : noms de stratégies de solver.STRATEGIES.
+    - games (int) : nombre de solutions tirées.
+    - seed : graine des solutions (les mêmes que simulate avec la même graine).
+    - workers (int) : nombre de processus (par défaut, le nombre de cœurs). 1 : tout dans le processus courant.
+    - colors (list) : liste de tuples (symbole, nom). Par défaut, DEFAULT_COLORS.
+    - config (GameConfig) : variante du jeu. Par défaut, DEFAULT_CONFIG.
+    - human_logs (list) : chemins de journaux de parties humaines (voir mastermind(log_path=...)).
+    - out_path (str) : fichier des résultats, ou None pour ne garder que le rapport.
+    - book (bool) : True pour jouer les premiers coups avec le livre d'ouvertures.
+    - chunk_size (int) : nombre de parties envoyées d'un coup à un processus.
+
+    Valeurs de retour:
+    dict. (joueur, jeu) -> rapport (voir Summary.report), où jeu est DRAWN ou REPLAY et joueur une stratégie ou
+    HUMAN.
+
+    Exemples:
+    >>> report = tournament(["minimax", "first"], 1000, workers=4)
+    >>> report[("minimax", DRAWN)]["failure_rate"]
+    0.0
+    """
+    space = open_space(colors, config)
+    if book:
+        for strategy in strategies:
+            open_book(colors, config, strategy)
+    table = share_table(colors, config) if workers != 1 else None
+    name = None if table is None else table.name
+
+    def chunks(secrets):
+        batch = []
+        for secret in secrets:
+            batch.append(secret)
+            if len(batch) == chunk_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def tasks():
+        generator = SecretGenerator(space, seed)
+        for strategy in strategies:
+            for chunk, start in enumerate(range(0, games, chunk_size)):
+                secrets = generator.spawn(chunk).batch(min(chunk_size, games - start))
+                yield strategy, DRAWN, colors, config, book, name, secrets
+        for path in human_logs:  # Journaux relus pour chaque stratégie plutôt que gardés en mémoire
+            for strategy in strategies:
+                for secrets in chunks(game[0] for game in human_games(path, space)):
+                    yield strategy, REPLAY, colors, config, book, name, secrets
+
+    summaries = {}
+
+    def add(player, kind, secret, attempts, won, seconds, timed_moves):
+        summary = summaries.get((player, kind))
+        if summary is None:
+            summary = summaries[(player, kind)] = Summary()
+        summary.add(attempts, won, seconds, timed_moves)
+        if writer is not None:
+            writer.writerow((player, kind, secret, attempts, int(won), "%.9f" % seconds, timed_moves))
+
+    out = None if out_path is None else open(out_path, "w", newline="", encoding="utf-8")
+    writer = None if out is None else csv.writer(out)
+    pool = None
+    try:
+        if writer is not None:
+            writer.writerow(FIELDS)
+        for path in human_logs:
+            for game in human_games(path, space):
+                add(HUMAN, REPLAY, *game)
+        if workers == 1:
+            results = map(_play_chunk, tasks())
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            workers = workers or os.cpu_count()
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = _bounded_map(pool, _play_chunk, tasks(), 4 * workers)
+        for strategy, kind, chunk in results:
+            for game in chunk:
+                add(strategy, kind, *game)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if table is not None:
+            table.close()
+        if out is not None:
+            out.close()
+    return {key: summary.report() for key, summary in summaries.items()}
+
+
+def format_report(report):
+    """
+    Renvoie le rapport d'un tournoi sous forme de tableau (str), une ligne par joueur et par jeu de solutions.
+    """
+    lines = ["%-10s %-7s %8s %8s %4s %4s %4s %5s %8s %10s" % ("joueur", "jeu", "parties", "moyenne", "p50", "p90",
+                                                              "p99", "pire", "échecs", "ms/coup")]
+    for (player, kind), stats in sorted(report.items(), key=lambda item: (item[0][1], item[1]["mean"])):
+        lines.append("%-10s %-7s %8d %8.3f %4d %4d %4d %5d %7.2f%% %10.3f" % (
+            player, kind, stats["games"], stats["mean"], stats["p50"], stats["p90"], stats["p99"], stats["worst"],
+            100 * stats["failure_rate"], 1e3 * stats["per_move"]))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from solver import STRATEGIES
+
+    parser = argparse.ArgumentParser(description="Tournoi entre les stratégies du solveur et les joueurs humains")
+    parser.add_argument("strategies", nargs="*", default=sorted(STRATEGIES))
+    parser.add_argument("--games", type=int, default=1000, help="nombre de solutions tirées")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--human", action="append", default=[],
+                        help="journal de parties humaines (python mastermind.py parties.log), répétable")
+    parser.add_argument("--out", help="fichier CSV des résultats de chaque partie")
+    parser.add_argument("--report", help="refaire le rapport d'un fichier de résultats, sans jouer")
+    args = parser.parse_args()
+
+    if args.report:
+        print(format_report(summarize(read_results(args.report))))
+    else:
+        start = time.perf_counter()
+        report = tournament(args.strategies, args.games, args.seed, args.workers, human_logs=args.human,
+                            out_path=args.out)
+        print(format_report(report))
+        print("(%.1f s)" % (time.perf_counter() - start))